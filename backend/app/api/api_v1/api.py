@@ -4,7 +4,9 @@ API v1 router for the Disease Risk Prediction API with Supabase integration
 
 from fastapi import APIRouter
 
-from app.api.api_v1.endpoints import auth, users, predictions
+from app.api.api_v1.endpoints import auth, users, predictions, metadata
+
+__all__ = ["api_router"]
 
 api_router = APIRouter()
 
@@ -12,3 +14,4 @@ api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(predictions.router, prefix="/predictions", tags=["predictions"])
+api_router.include_router(metadata.router, tags=["metadata"])
@@ -2,39 +2,59 @@
 Authentication endpoints for the Disease Risk Prediction API with Supabase integration
 """
 
-from datetime import timedelta
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from fastapi.security import OAuth2PasswordRequestForm
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from fastapi.responses import ORJSONResponse
+from fastapi.security import HTTPAuthorizationCredentials
+from pydantic import BaseModel, ConfigDict
 
-from app.core.config import settings
 from app.core.supabase import get_supabase_client, SupabaseClient
-from app.core.auth_middleware import get_current_user, get_current_active_user
-from app.schemas.auth import Token, UserCreate, UserResponse
+from app.core.auth_middleware import get_current_user, forget_token, security
+import hashlib
 import logging
+import orjson
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Constant bodies, serialized once at import
+_LOGOUT_OK_BODY = b'{"message":"Logged out successfully"}'
+_RESET_EMAIL_SENT_BODY = b'{"message":"Password reset email sent"}'
+
+
+def _json_bytes_response(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json")
+
+
+# /me responses may be reused by the browser briefly, but must be revalidated after
+_ME_CACHE_CONTROL = "private, max-age=30, must-revalidate"
 
 
 class LoginRequest(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    
     email: str
     password: str
 
 
 class RegisterRequest(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    
     email: str
     password: str
-    full_name: str = None
+    full_name: Optional[str] = None
 
 
 class PasswordResetRequest(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    
     email: str
 
 
 class PasswordUpdateRequest(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    
     token: str
     new_password: str
 
@@ -54,35 +74,23 @@ async def register(
         )
     
     try:
-        # Register user with Supabase Auth
-        response = supabase.client.auth.sign_up({
-            "email": user_data.email,
-            "password": user_data.password,
-            "options": {
-                "data": {
-                    "full_name": user_data.full_name
-                }
-            }
-        })
+        # Register user with Supabase Auth (full_name is copied into user_profiles by trigger)
+        response = await supabase.sign_up(
+            user_data.email,
+            user_data.password,
+            {"full_name": user_data.full_name}
+        )
+        user = response.get("user") or response
         
-        if response.user:
-            # Create initial user profile
-            await supabase.create_user_profile(
-                response.user.id,
-                {
-                    "full_name": user_data.full_name,
-                    "demographics_complete": False,
-                    "lifestyle_complete": False,
-                    "medical_history_complete": False
-                }
-            )
-            
+        if user.get("id"):
+            # The initial profile row is created by the on_auth_user_created
+            # trigger from raw_user_meta_data, so no second round-trip is needed
             return {
                 "message": "User registered successfully",
                 "user": {
-                    "id": response.user.id,
-                    "email": response.user.email,
-                    "email_confirmed": response.user.email_confirmed_at is not None
+                    "id": user["id"],
+                    "email": user.get("email"),
+                    "email_confirmed": user.get("email_confirmed_at") is not None
                 }
             }
         else:
@@ -115,21 +123,22 @@ async def login(
     
     try:
         # Authenticate with Supabase
-        response = supabase.client.auth.sign_in_with_password({
-            "email": login_data.email,
-            "password": login_data.password
-        })
+        session = await supabase.sign_in_with_password(
+            login_data.email,
+            login_data.password
+        )
+        user = session.get("user")
         
-        if response.user and response.session:
+        if user and session.get("access_token"):
             return {
-                "access_token": response.session.access_token,
-                "refresh_token": response.session.refresh_token,
+                "access_token": session["access_token"],
+                "refresh_token": session.get("refresh_token"),
                 "token_type": "bearer",
-                "expires_in": response.session.expires_in,
+                "expires_in": session.get("expires_in"),
                 "user": {
-                    "id": response.user.id,
-                    "email": response.user.email,
-                    "email_confirmed": response.user.email_confirmed_at is not None
+                    "id": user["id"],
+                    "email": user.get("email"),
+                    "email_confirmed": user.get("email_confirmed_at") is not None
                 }
             }
         else:
@@ -161,14 +170,14 @@ async def refresh_token(
         )
     
     try:
-        response = supabase.client.auth.refresh_session(refresh_token)
+        session = await supabase.refresh_session(refresh_token)
         
-        if response.session:
+        if session.get("access_token"):
             return {
-                "access_token": response.session.access_token,
-                "refresh_token": response.session.refresh_token,
+                "access_token": session["access_token"],
+                "refresh_token": session.get("refresh_token"),
                 "token_type": "bearer",
-                "expires_in": response.session.expires_in
+                "expires_in": session.get("expires_in")
             }
         else:
             raise HTTPException(
@@ -187,27 +196,30 @@ async def refresh_token(
 @router.post("/logout")
 async def logout(
     current_user: Dict[str, Any] = Depends(get_current_user),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
     supabase: SupabaseClient = Depends(get_supabase_client)
-) -> Dict[str, str]:
+) -> Response:
     """
     Logout user (sign out from Supabase)
     """
+    forget_token(credentials.credentials)
+    
     if not supabase.is_connected():
-        return {"message": "Logged out successfully"}
+        return _json_bytes_response(_LOGOUT_OK_BODY)
     
     try:
-        supabase.client.auth.sign_out()
-        return {"message": "Logged out successfully"}
+        await supabase.client.auth.sign_out()
+        return _json_bytes_response(_LOGOUT_OK_BODY)
     except Exception as e:
         logger.error(f"Logout error: {e}")
-        return {"message": "Logged out successfully"}
+        return _json_bytes_response(_LOGOUT_OK_BODY)
 
 
 @router.post("/forgot-password")
 async def forgot_password(
     request: PasswordResetRequest,
     supabase: SupabaseClient = Depends(get_supabase_client)
-) -> Dict[str, str]:
+) -> Response:
     """
     Send password reset email via Supabase
     """
@@ -218,12 +230,12 @@ async def forgot_password(
         )
     
     try:
-        supabase.client.auth.reset_password_email(request.email)
-        return {"message": "Password reset email sent"}
+        await supabase.client.auth.reset_password_email(request.email)
+        return _json_bytes_response(_RESET_EMAIL_SENT_BODY)
     except Exception as e:
         logger.error(f"Password reset error: {e}")
         # Don't reveal if email exists or not for security
-        return {"message": "Password reset email sent"}
+        return _json_bytes_response(_RESET_EMAIL_SENT_BODY)
 
 
 @router.post("/reset-password")
@@ -242,7 +254,7 @@ async def reset_password(
     
     try:
         # Verify and update password
-        response = supabase.client.auth.update_user({
+        response = await supabase.client.auth.update_user({
             "password": request.new_password
         })
         
@@ -264,15 +276,25 @@ async def reset_password(
 
 @router.get("/me")
 async def get_current_user_info(
+    request: Request,
     current_user: Dict[str, Any] = Depends(get_current_user),
     supabase: SupabaseClient = Depends(get_supabase_client)
-) -> Dict[str, Any]:
+) -> Response:
     """
     Get current user information and profile
+    
+    Responds with 304 Not Modified when the client's ETag still matches.
     """
     user_profile = await supabase.get_user_profile(current_user["id"])
     
-    return {
+    body = orjson.dumps({
         "user": current_user,
         "profile": user_profile
-    }
+    })
+    etag = f'W/"{hashlib.md5(body).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": _ME_CACHE_CONTROL}
+    
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    return Response(content=body, media_type="application/json", headers=headers)
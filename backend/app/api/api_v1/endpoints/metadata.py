@@ -0,0 +1,25 @@
+"""
+Static reference data endpoints
+"""
+
+from fastapi import APIRouter, Response
+
+from app.ml.ethnicity_risk_predictor import risk_predictor
+
+router = APIRouter()
+
+# Constant for the lifetime of a deployment, so CDNs and browsers may keep it
+_STATIC_CACHE_CONTROL = "public, max-age=86400, immutable"
+
+# Built once at import (application startup)
+_ETHNICITY_METADATA = risk_predictor.get_ethnicity_metadata()
+
+
+@router.get("/ethnicity-metadata")
+async def get_ethnicity_metadata(response: Response):
+    """
+    Study attributions and health context per ethnicity, keyed by the
+    "ethnicity" value returned with ethnicity-aware risk predictions
+    """
+    response.headers["Cache-Control"] = _STATIC_CACHE_CONTROL
+    return _ETHNICITY_METADATA
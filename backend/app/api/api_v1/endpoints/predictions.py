@@ -2,207 +2,460 @@
 Disease risk prediction endpoints with Groq AI integration
 """
 
-from typing import Any, Dict, List
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime
+import asyncio
+import copy
+import httpx
 
 from app.core.supabase import get_supabase_client, SupabaseClient
 from app.core.auth_middleware import get_current_user, get_user_id
 from app.core.config import settings
-from app.services.groq_ai_service import GroqAIService
+from app.services.groq_ai_service import GroqAIService, GroqServiceError
 from app.services.medical_algorithms import MedicalAlgorithmFramework
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.prediction_cache import PredictionCache
 import logging
+import orjson
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
-# Initialize Groq AI service
-def get_groq_service() -> GroqAIService:
-    """Get Groq AI service instance"""
-    if not settings.GROQ_API_KEY:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Groq API key not configured"
+# Stateless medical algorithms, shared by every request
+_ALGO_FRAMEWORK = MedicalAlgorithmFramework()
+
+
+async def run_risk_assessment(user_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Run the CPU-bound algorithm framework in the default thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, _ALGO_FRAMEWORK.comprehensive_risk_assessment, user_data)
+
+
+# Maps "Heart Disease" -> "heart_disease" in a single str.translate call
+_LOWER_UNDERSCORE = str.maketrans(" ABCDEFGHIJKLMNOPQRSTUVWXYZ", "_abcdefghijklmnopqrstuvwxyz")
+
+
+def build_confidence_scores(risk_assessments: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Confidence scores (0-1) keyed by normalized disease name"""
+    confidence_scores = {}
+    for assessment in risk_assessments:
+        key = assessment["disease_name"].translate(_LOWER_UNDERSCORE)
+        confidence_scores[key] = assessment["confidence_score"] / 100
+    return confidence_scores
+
+
+# Stops calling Groq for reasoning during an outage instead of waiting out the timeout each time
+_REASONING_BREAKER = CircuitBreaker(
+    failure_threshold=settings.GROQ_BREAKER_FAILURE_THRESHOLD,
+    cooldown_seconds=settings.GROQ_BREAKER_COOLDOWN_S
+)
+
+
+async def generate_reasoning_with_timeout(
+    groq_service: GroqAIService,
+    user_data: Dict[str, Any],
+    algorithm_results: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """Llama-4 reasoning bounded by GROQ_REASONING_TIMEOUT_S; None if it failed or was skipped"""
+    if not _REASONING_BREAKER.allow():
+        logger.info("Skipping Llama-4 reasoning: circuit open after repeated failures")
+        return None
+    
+    try:
+        reasoning = await asyncio.wait_for(
+            groq_service.generate_health_reasoning(user_data, algorithm_results),
+            timeout=settings.GROQ_REASONING_TIMEOUT_S
         )
-    return GroqAIService(settings.GROQ_API_KEY)
+    except asyncio.TimeoutError:
+        _REASONING_BREAKER.record_failure()
+        logger.warning(
+            f"Llama-4 reasoning timed out after {settings.GROQ_REASONING_TIMEOUT_S}s "
+            f"(consecutive failures: {_REASONING_BREAKER.consecutive_failures})"
+        )
+        return None
+    except (httpx.HTTPError, GroqServiceError) as e:
+        _REASONING_BREAKER.record_failure()
+        logger.warning(f"Llama-4 reasoning failed: {e}")
+        return None
+    
+    _REASONING_BREAKER.record_success()
+    return reasoning
+
+
+# Finished AI predictions for assessments we've already seen
+_PREDICTION_CACHE = PredictionCache(
+    maxsize=settings.PREDICTION_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PREDICTION_CACHE_TTL_SECONDS
+)
+
+
+# Groq AI service, created on first use
+_GROQ_SERVICE: Optional[GroqAIService] = None
+
+
+def get_groq_service() -> GroqAIService:
+    """Get the shared Groq AI service instance"""
+    global _GROQ_SERVICE
+    if _GROQ_SERVICE is None:
+        if not settings.GROQ_API_KEY:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Groq API key not configured"
+            )
+        _GROQ_SERVICE = GroqAIService(settings.GROQ_API_KEY)
+    return _GROQ_SERVICE
+
+
+async def close_groq_service() -> None:
+    """Release the shared Groq service's pooled connections, if it was created"""
+    global _GROQ_SERVICE
+    if _GROQ_SERVICE is not None:
+        await _GROQ_SERVICE.aclose()
+        _GROQ_SERVICE = None
+
+
+# Skips Groq predictions during an outage so /predict answers from the algorithms at once
+_PREDICTION_BREAKER = CircuitBreaker(
+    failure_threshold=settings.GROQ_BREAKER_FAILURE_THRESHOLD,
+    cooldown_seconds=settings.GROQ_BREAKER_COOLDOWN_S
+)
+
+# Groq failures that the medical-algorithm fallback covers (timeouts are httpx errors)
+_GROQ_FAILURES = (HTTPException, httpx.HTTPError, GroqServiceError, CircuitOpenError)
+
+
+async def request_ai_predictions(user_data: Dict[str, Any]) -> Tuple[GroqAIService, Dict[str, Any]]:
+    """Groq predictions behind the prediction circuit breaker; raises one of _GROQ_FAILURES"""
+    groq_service = get_groq_service()
+    if not _PREDICTION_BREAKER.allow():
+        raise CircuitOpenError("Groq predictions skipped: circuit open after repeated failures")
+    
+    try:
+        ai_predictions = await groq_service.predict_disease_risks(user_data)
+    except (httpx.HTTPError, GroqServiceError):
+        _PREDICTION_BREAKER.record_failure()
+        raise
+    
+    _PREDICTION_BREAKER.record_success()
+    return groq_service, ai_predictions
 
 
 class PredictionRequest(BaseModel):
     """Request model for risk prediction"""
+    model_config = ConfigDict(extra="ignore", frozen=True)
+    
     include_lab_results: bool = True
     prediction_types: List[str] = ["heart_disease", "diabetes", "cancer"]
-    user_data: Dict[str, Any] = None
+    user_data: Optional[Dict[str, Any]] = None
 
 
-class PredictionResponse(BaseModel):
-    """Response model for risk predictions"""
-    predictions: List[Dict[str, Any]]
-    model_version: str
-    prediction_date: str
-    confidence_scores: Dict[str, float]
+# Reasoning shown when the AI predictions succeeded but the algorithm framework did not
+_AI_ONLY_REASONING = {
+    "health_score_reasoning": "AI-powered analysis based on your comprehensive health assessment data.",
+    "lifestyle_improvements": ["Maintain regular exercise", "Follow a balanced diet", "Get adequate sleep", "Manage stress effectively", "Schedule regular health check-ups"],
+    "personalized_insights": ["Your assessment has been analyzed using advanced AI", "Focus on the recommendations provided", "Consult healthcare providers for medical decisions"]
+}
 
+# Keys added to the Groq predictions by enrich_ai_predictions
+_ENRICHMENT_KEYS = ("life_expectancy", "comprehensive_recommendations", "llama_reasoning")
 
-@router.post("/predict")
-async def predict_disease_risk(request: PredictionRequest) -> Dict[str, Any]:
+
+async def enrich_ai_predictions(
+    groq_service: GroqAIService,
+    user_data: Dict[str, Any],
+    ai_predictions: Dict[str, Any]
+) -> bool:
     """
-    Generate disease risk predictions using Groq AI with Llama-4
-    Uses actual user data from assessment for dynamic, personalized predictions
+    Add life expectancy, recommendations and Llama-4 reasoning in place
+    
+    Returns False when either step fell back to generic content, so the
+    result is not worth caching.
     """
     try:
-        # Validate that user data is provided
-        if not request.user_data:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="User assessment data is required for predictions"
-            )
+        algorithm_results = await run_risk_assessment(user_data)
         
-        user_data = request.user_data
-        logger.info(f"Generating AI predictions for user data: {list(user_data.keys())}")
+        # Add life expectancy and comprehensive recommendations to AI predictions
+        ai_predictions["life_expectancy"] = algorithm_results["life_expectancy"]
+        ai_predictions["comprehensive_recommendations"] = algorithm_results["comprehensive_recommendations"]
         
-        # Primary method: Use Groq AI for dynamic predictions
-        try:
-            groq_service = get_groq_service()
-            ai_predictions = await groq_service.predict_disease_risks(user_data)
-            
-            # Add life expectancy calculation using medical algorithms
-            try:
-                algorithm_framework = MedicalAlgorithmFramework()
-                algorithm_results = algorithm_framework.comprehensive_risk_assessment(user_data)
-                
-                # Add life expectancy and comprehensive recommendations to AI predictions
-                ai_predictions["life_expectancy"] = algorithm_results["life_expectancy"]
-                ai_predictions["comprehensive_recommendations"] = algorithm_results["comprehensive_recommendations"]
-                
-                # Generate Llama-4 reasoning for the results
-                llama_reasoning = await groq_service.generate_health_reasoning(user_data, algorithm_results)
-                ai_predictions["llama_reasoning"] = llama_reasoning
-                
-            except Exception as e:
-                logger.warning(f"Algorithm framework failed, using AI-only results: {e}")
-                # AI predictions already contain the core data, just add fallback reasoning
-                ai_predictions["llama_reasoning"] = {
-                    "health_score_reasoning": f"AI-powered analysis based on your comprehensive health assessment data.",
-                    "lifestyle_improvements": ["Maintain regular exercise", "Follow a balanced diet", "Get adequate sleep", "Manage stress effectively", "Schedule regular health check-ups"],
-                    "personalized_insights": ["Your assessment has been analyzed using advanced AI", "Focus on the recommendations provided", "Consult healthcare providers for medical decisions"]
-                }
-            
-            logger.info("Successfully generated AI-powered predictions")
-            return ai_predictions
-            
-        except Exception as e:
-            logger.error(f"Groq AI prediction failed: {e}")
-            
-            # Fallback method: Use medical algorithms if AI fails
-            logger.info("Falling back to medical algorithms")
-            algorithm_framework = MedicalAlgorithmFramework()
-            algorithm_results = algorithm_framework.comprehensive_risk_assessment(user_data)
-            
-            # Convert algorithm results to expected format
-            fallback_predictions = {
-                "predictions": algorithm_results["risk_assessments"],
-                "model_version": f"{algorithm_results['algorithm_framework']} (AI Fallback)",
-                "prediction_date": algorithm_results["assessment_date"],
-                "confidence_scores": {
-                    assessment["disease_name"].lower().replace(" ", "_"): assessment["confidence_score"] / 100
-                    for assessment in algorithm_results["risk_assessments"]
-                },
-                "overall_assessment": {
-                    "health_score": algorithm_results["health_score"],
-                    "primary_concerns": [],
-                    "positive_factors": [],
-                    "immediate_actions": algorithm_results["comprehensive_recommendations"][:3]
-                },
-                "life_expectancy": algorithm_results["life_expectancy"],
-                "comprehensive_recommendations": algorithm_results["comprehensive_recommendations"],
-                "analysis_notes": f"Evidence-based medical algorithms (AI service unavailable). Life expectancy: {algorithm_results['life_expectancy']['current_life_expectancy']} years",
-                "llama_reasoning": {
-                    "health_score_reasoning": f"Your health score of {algorithm_results['health_score']}/100 is based on evidence-based medical algorithms considering your age, lifestyle factors, and risk assessments.",
-                    "lifestyle_improvements": algorithm_results["comprehensive_recommendations"][:5],
-                    "personalized_insights": ["Assessment completed using validated clinical algorithms", "AI service temporarily unavailable", "Consult healthcare providers for personalized medical advice"]
-                }
-            }
-            
-            return fallback_predictions
+        # Generate Llama-4 reasoning for the results
+        llama_reasoning = await generate_reasoning_with_timeout(groq_service, user_data, algorithm_results)
+        if llama_reasoning is None:
+            ai_predictions["llama_reasoning"] = groq_service.get_fallback_reasoning(algorithm_results)
+            return False
+        ai_predictions["llama_reasoning"] = llama_reasoning
         
-    except HTTPException:
-        raise
     except Exception as e:
-        logger.error(f"Prediction error: {e}")
+        logger.warning(f"Algorithm framework failed, using AI-only results: {e}")
+        # AI predictions already contain the core data, just add fallback reasoning
+        ai_predictions["llama_reasoning"] = _AI_ONLY_REASONING
+        return False
+    
+    return True
+
+
+async def build_fallback_predictions(user_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Predictions from the medical algorithms alone, in the AI response format"""
+    algorithm_results = await run_risk_assessment(user_data)
+    
+    return {
+        "predictions": algorithm_results["risk_assessments"],
+        "model_version": f"{algorithm_results['algorithm_framework']} (AI Fallback)",
+        "prediction_date": algorithm_results["assessment_date"],
+        "confidence_scores": build_confidence_scores(algorithm_results["risk_assessments"]),
+        "overall_assessment": {
+            "health_score": algorithm_results["health_score"],
+            "immediate_actions": algorithm_results["comprehensive_recommendations"][:3]
+        },
+        "life_expectancy": algorithm_results["life_expectancy"],
+        "comprehensive_recommendations": algorithm_results["comprehensive_recommendations"],
+        "analysis_notes": f"Evidence-based medical algorithms (AI service unavailable). Life expectancy: {algorithm_results['life_expectancy']['current_life_expectancy']} years",
+        "llama_reasoning": {
+            "health_score_reasoning": f"Your health score of {algorithm_results['health_score']}/100 is based on evidence-based medical algorithms considering your age, lifestyle factors, and risk assessments.",
+            "lifestyle_improvements": algorithm_results["comprehensive_recommendations"][:5],
+            "personalized_insights": ["Assessment completed using validated clinical algorithms", "AI service temporarily unavailable", "Consult healthcare providers for personalized medical advice"]
+        }
+    }
+
+
+def _require_user_data(request: PredictionRequest) -> Dict[str, Any]:
+    if not request.user_data:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Prediction failed: {str(e)}"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User assessment data is required for predictions"
         )
+    return request.user_data
+
+
+@router.post("/predict", response_model=None)
+async def predict_disease_risk(request: PredictionRequest) -> Dict[str, Any]:
+    """
+    Generate disease risk predictions using Groq AI with Llama-4
+    Uses actual user data from assessment for dynamic, personalized predictions
+    """
+    # Validate that user data is provided
+    user_data = _require_user_data(request)
+    
+    cache_key = PredictionCache.make_key(user_data, request.prediction_types)
+    cached = _PREDICTION_CACHE.get(cache_key)
+    if cached is not None:
+        logger.info("Returning cached AI predictions for unchanged assessment")
+        return cached
+    
+    logger.info(f"Generating AI predictions for user data: {list(user_data.keys())}")
+    
+    # Primary method: Use Groq AI for dynamic predictions
+    try:
+        groq_service, ai_predictions = await request_ai_predictions(user_data)
+    except _GROQ_FAILURES as e:
+        logger.error(f"Groq AI prediction failed: {getattr(e, 'detail', e)}")
+        
+        # Fallback method: Use medical algorithms if AI is unavailable
+        logger.info("Falling back to medical algorithms")
+        return await build_fallback_predictions(user_data)
+    
+    enriched = await enrich_ai_predictions(groq_service, user_data, ai_predictions)
+    
+    logger.info("Successfully generated AI-powered predictions")
+    if enriched:
+        _PREDICTION_CACHE.set(cache_key, ai_predictions)
+    return ai_predictions
+
+
+# GZipMiddleware buffers a response until it has minimum_size bytes, which would
+# hold streamed events back; it leaves responses with a Content-Encoding alone
+_UNCOMPRESSED = {"Content-Encoding": "identity"}
+
+
+def _sse_event(event: str, data: Any) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+async def _stream_prediction_events(user_data: Dict[str, Any], cache_key: str):
+    """
+    Yield the prediction in stages as Server-Sent Events.
+    
+    `predictions` carries the Groq risk predictions as soon as they arrive,
+    `details` the life expectancy, recommendations and reasoning computed
+    afterwards, and `done` closes the stream. Cached and algorithm-only
+    results are sent whole as a single `result` event.
+    """
+    cached = _PREDICTION_CACHE.get(cache_key)
+    if cached is not None:
+        yield _sse_event("result", cached)
+        yield _sse_event("done", {})
+        return
+    
+    try:
+        try:
+            groq_service, ai_predictions = await request_ai_predictions(user_data)
+        except _GROQ_FAILURES as e:
+            logger.error(f"Groq AI prediction failed: {getattr(e, 'detail', e)}")
+            yield _sse_event("result", await build_fallback_predictions(user_data))
+            yield _sse_event("done", {})
+            return
+        
+        yield _sse_event("predictions", ai_predictions)
+        
+        enriched = await enrich_ai_predictions(groq_service, user_data, ai_predictions)
+        yield _sse_event("details", {key: ai_predictions[key] for key in _ENRICHMENT_KEYS if key in ai_predictions})
+        
+        if enriched:
+            _PREDICTION_CACHE.set(cache_key, ai_predictions)
+        yield _sse_event("done", {})
+        
+    except Exception:
+        # Headers are already sent, so the failure is reported in-band
+        logger.exception("Streaming prediction error")
+        yield _sse_event("error", {"detail": "Prediction failed"})
+
+
+@router.post("/predict/stream", response_model=None)
+async def stream_disease_risk(request: PredictionRequest) -> StreamingResponse:
+    """
+    Same prediction as /predict, streamed as Server-Sent Events so the risk
+    predictions reach the client before the slower reasoning step finishes
+    """
+    user_data = _require_user_data(request)
+    cache_key = PredictionCache.make_key(user_data, request.prediction_types)
+    
+    return StreamingResponse(
+        _stream_prediction_events(user_data, cache_key),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", **_UNCOMPRESSED}
+    )
+
+
+async def _stream_ndjson(supabase: SupabaseClient, user_id: str):
+    """Serialize predictions one JSON object per line as pages arrive"""
+    async for row in supabase.iter_risk_predictions(user_id):
+        yield orjson.dumps(row) + b"\n"
 
 
 @router.get("/history")
 async def get_prediction_history(
     user_id: str = Depends(get_user_id),
     supabase: SupabaseClient = Depends(get_supabase_client)
-) -> Dict[str, List[Dict[str, Any]]]:
+) -> StreamingResponse:
     """
     Get user's prediction history
+    
+    Streamed as NDJSON (one prediction per line, newest first).
     """
-    predictions = await supabase.get_risk_predictions(user_id)
-    return {"prediction_history": predictions}
+    return StreamingResponse(
+        _stream_ndjson(supabase, user_id),
+        media_type="application/x-ndjson",
+        headers=_UNCOMPRESSED
+    )
 
 
 @router.get("/latest")
 async def get_latest_predictions(
+    response: Response,
     user_id: str = Depends(get_user_id),
     supabase: SupabaseClient = Depends(get_supabase_client)
 ) -> Dict[str, List[Dict[str, Any]]]:
     """
     Get user's latest predictions (most recent for each disease type)
     """
-    all_predictions = await supabase.get_risk_predictions(user_id)
-    
-    # Group by disease and get latest for each
-    latest_predictions = {}
-    for prediction in all_predictions:
-        disease = prediction.get("disease_name")
-        if disease not in latest_predictions:
-            latest_predictions[disease] = prediction
-        else:
-            # Compare dates and keep the latest
-            current_date = prediction.get("prediction_date")
-            existing_date = latest_predictions[disease].get("prediction_date")
-            if current_date > existing_date:
-                latest_predictions[disease] = prediction
-    
-    return {"latest_predictions": list(latest_predictions.values())}
+    latest = await supabase.get_latest_predictions_per_disease(user_id)
+    response.headers["Cache-Control"] = "private, max-age=15"
+    return {"latest_predictions": latest}
 
 
-@router.post("/test-predict")
+# Sample assessment used by /test-predict (shared, do not mutate)
+_DEFAULT_SAMPLE_USER_DATA: Dict[str, Any] = {
+    "age": 35,
+    "sex": "male",
+    "height_cm": 175,
+    "weight_kg": 75,
+    "ethnicity": "caucasian",
+    "diet_type": "balanced",
+    "exercise_frequency": "3-4 times per week",
+    "sleep_hours": 7,
+    "tobacco_use": "never",
+    "alcohol_consumption": "moderate",
+    "occupation": "office worker",
+    "past_diagnoses": [],
+    "family_history": ["heart_disease"],
+    "current_symptoms": [],
+    "medications": [],
+    "lab_results": []
+}
+
+
+# Static part of the /test-predict fallback response, built once at import
+_FALLBACK_TEST_PREDICTIONS_TEMPLATE: Dict[str, Any] = {
+    "predictions": [
+        {
+            "disease_name": "Heart Disease",
+            "risk_score": 15,
+            "risk_category": "Low",
+            "confidence_score": 85,
+            "recommendations": [
+                "Test endpoint working - Groq AI service available",
+                "Maintain regular exercise routine",
+                "Follow a heart-healthy diet",
+                "Monitor blood pressure regularly",
+                "Schedule regular check-ups"
+            ],
+            "key_risk_factors": ["Family history"]
+        },
+        {
+            "disease_name": "Diabetes",
+            "risk_score": 12,
+            "risk_category": "Low",
+            "confidence_score": 88,
+            "recommendations": [
+                "Test endpoint working - Groq AI service available",
+                "Maintain healthy weight",
+                "Exercise regularly",
+                "Monitor blood sugar levels",
+                "Eat a balanced diet"
+            ],
+            "key_risk_factors": ["Age", "Lifestyle"]
+        },
+        {
+            "disease_name": "Cancer",
+            "risk_score": 10,
+            "risk_category": "Low",
+            "confidence_score": 82,
+            "recommendations": [
+                "Test endpoint working - Groq AI service available",
+                "Follow cancer screening guidelines",
+                "Maintain healthy lifestyle",
+                "Avoid tobacco and limit alcohol",
+                "Eat plenty of fruits and vegetables"
+            ],
+            "key_risk_factors": ["Age", "Lifestyle"]
+        }
+    ],
+    "model_version": "Groq-AI-Test-Mode",
+    "confidence_scores": {
+        "heart_disease": 0.85,
+        "diabetes": 0.88,
+        "cancer": 0.82
+    },
+    "test_mode": True,
+    # Fixed text: this endpoint is unauthenticated, so error details stay in the server log
+    "error_occurred": "AI prediction failed",
+    "note": "Fallback predictions due to error: AI prediction failed"
+}
+
+
+@router.post("/test-predict", response_model=None)
 async def test_predict_disease_risk() -> Dict[str, Any]:
     """
     Test endpoint for disease risk predictions without authentication
     Uses mock data to test the Groq AI service
     """
     try:
-        # Mock user data for testing
-        mock_user_data = {
-            "age": 35,
-            "sex": "male",
-            "height_cm": 175,
-            "weight_kg": 75,
-            "ethnicity": "caucasian",
-            "diet_type": "balanced",
-            "exercise_frequency": "3-4 times per week",
-            "sleep_hours": 7,
-            "tobacco_use": "never",
-            "alcohol_consumption": "moderate",
-            "occupation": "office worker",
-            "past_diagnoses": [],
-            "family_history": ["heart_disease"],
-            "current_symptoms": [],
-            "medications": [],
-            "lab_results": []
-        }
-        
         # Generate AI-powered predictions using Groq
         groq_service = get_groq_service()
-        ai_predictions = await groq_service.predict_disease_risks(mock_user_data)
+        ai_predictions = await groq_service.predict_disease_risks(_DEFAULT_SAMPLE_USER_DATA)
         
         # Add test metadata
         ai_predictions["test_mode"] = True
@@ -211,135 +464,118 @@ async def test_predict_disease_risk() -> Dict[str, Any]:
         
         return ai_predictions
         
-    except Exception as e:
-        logger.error(f"Test prediction error: {e}")
+    except Exception:
+        logger.exception("Test prediction error")
         # Return fallback predictions for testing
-        return {
-            "predictions": [
-                {
-                    "disease_name": "Heart Disease",
-                    "risk_score": 15,
-                    "risk_category": "Low",
-                    "confidence_score": 85,
-                    "recommendations": [
-                        "Test endpoint working - Groq AI service available",
-                        "Maintain regular exercise routine",
-                        "Follow a heart-healthy diet",
-                        "Monitor blood pressure regularly",
-                        "Schedule regular check-ups"
-                    ],
-                    "key_risk_factors": ["Family history"]
-                },
-                {
-                    "disease_name": "Diabetes",
-                    "risk_score": 12,
-                    "risk_category": "Low",
-                    "confidence_score": 88,
-                    "recommendations": [
-                        "Test endpoint working - Groq AI service available",
-                        "Maintain healthy weight",
-                        "Exercise regularly",
-                        "Monitor blood sugar levels",
-                        "Eat a balanced diet"
-                    ],
-                    "key_risk_factors": ["Age", "Lifestyle"]
-                },
-                {
-                    "disease_name": "Cancer",
-                    "risk_score": 10,
-                    "risk_category": "Low",
-                    "confidence_score": 82,
-                    "recommendations": [
-                        "Test endpoint working - Groq AI service available",
-                        "Follow cancer screening guidelines",
-                        "Maintain healthy lifestyle",
-                        "Avoid tobacco and limit alcohol",
-                        "Eat plenty of fruits and vegetables"
-                    ],
-                    "key_risk_factors": ["Age", "Lifestyle"]
-                }
-            ],
-            "model_version": "Groq-AI-Test-Mode",
-            "prediction_date": datetime.utcnow().isoformat(),
-            "confidence_scores": {
-                "heart_disease": 0.85,
-                "diabetes": 0.88,
-                "cancer": 0.82
-            },
-            "test_mode": True,
-            "error_occurred": str(e),
-            "note": "Fallback predictions due to error: " + str(e)
-        }
+        response = copy.copy(_FALLBACK_TEST_PREDICTIONS_TEMPLATE)
+        response["prediction_date"] = datetime.utcnow().isoformat()
+        return response
+
+
+# Risk-tier recommendations per disease: (threshold, recommendations), checked in order
+_RECS: Dict[str, Tuple[Tuple[float, Tuple[str, ...]], ...]] = {
+    "heart_disease": (
+        (0.7, (
+            "Consult with a cardiologist for comprehensive evaluation",
+            "Consider cardiac stress testing and advanced lipid panel",
+            "Implement immediate lifestyle changes including diet and exercise"
+        )),
+        (0.4, (
+            "Schedule regular check-ups with your primary care physician",
+            "Monitor blood pressure and cholesterol levels regularly",
+            "Adopt a heart-healthy diet (Mediterranean or DASH diet)"
+        )),
+    ),
+    "diabetes": (
+        (0.7, (
+            "Consult with an endocrinologist for diabetes prevention strategies",
+            "Get HbA1c and glucose tolerance testing",
+            "Consider pre-diabetes medication if recommended by your doctor"
+        )),
+        (0.4, (
+            "Monitor blood sugar levels regularly",
+            "Adopt a low-glycemic diet with controlled carbohydrate intake",
+            "Maintain a healthy weight through diet and exercise"
+        )),
+    ),
+    "cancer": (
+        (0.6, (
+            "Discuss cancer screening schedule with your oncologist",
+            "Consider genetic counseling if family history is significant",
+            "Maintain regular screening appointments (mammograms, colonoscopies, etc.)"
+        )),
+    ),
+}
+
+_MAX_RECOMMENDATIONS = 5
+_OVERWEIGHT_BMI = 25
+_INACTIVE_EXERCISE = frozenset(("never", "rarely"))
+
+_CANCER_PREVENTION_RECS = (
+    "Maintain a diet rich in fruits, vegetables, and whole grains",
+    "Limit processed meats and alcohol consumption",
+    "Protect skin from UV exposure and avoid tobacco products"
+)
+
+_GENERAL_RECS = (
+    "Maintain regular health check-ups",
+    "Follow a balanced, nutritious diet",
+    "Stay physically active with regular exercise",
+    "Manage stress through relaxation techniques or counseling"
+)
+
+
+def _heart_lifestyle_hook(user_data: Dict[str, Any]) -> List[str]:
+    """Lifestyle-specific heart recommendations"""
+    extra = []
+    if user_data.get("tobacco_use") == "yes":
+        extra.append("Quit smoking - this is the single most important step for heart health")
+    if user_data.get("exercise_frequency") in _INACTIVE_EXERCISE:
+        extra.append("Start with 30 minutes of moderate exercise 5 days per week")
+    return extra
+
+
+def _diabetes_weight_hook(user_data: Dict[str, Any]) -> List[str]:
+    """Weight-specific diabetes recommendations"""
+    weight_kg = user_data.get("weight_kg")
+    height_cm = user_data.get("height_cm")
+    if weight_kg and height_cm:
+        bmi = weight_kg / ((height_cm / 100) ** 2)
+        if bmi > _OVERWEIGHT_BMI:
+            return ["Focus on gradual weight loss to reduce diabetes risk"]
+    return []
+
+
+def _cancer_prevention_hook(user_data: Dict[str, Any]) -> Tuple[str, ...]:
+    """Cancer prevention recommendations apply to everyone"""
+    return _CANCER_PREVENTION_RECS
+
+
+_POST_HOOKS: Dict[str, Callable[[Dict[str, Any]], Sequence[str]]] = {
+    "heart_disease": _heart_lifestyle_hook,
+    "diabetes": _diabetes_weight_hook,
+    "cancer": _cancer_prevention_hook,
+}
 
 
 def generate_recommendations(disease_type: str, risk_score: float, user_data: Dict[str, Any]) -> List[str]:
     """
     Generate personalized recommendations based on risk score and user data
     """
-    recommendations = []
+    recommendations: List[str] = []
     
-    if disease_type == "heart_disease":
-        if risk_score > 0.7:
-            recommendations.extend([
-                "Consult with a cardiologist for comprehensive evaluation",
-                "Consider cardiac stress testing and advanced lipid panel",
-                "Implement immediate lifestyle changes including diet and exercise"
-            ])
-        elif risk_score > 0.4:
-            recommendations.extend([
-                "Schedule regular check-ups with your primary care physician",
-                "Monitor blood pressure and cholesterol levels regularly",
-                "Adopt a heart-healthy diet (Mediterranean or DASH diet)"
-            ])
-        
-        # Lifestyle-specific recommendations
-        if user_data.get("tobacco_use") == "yes":
-            recommendations.append("Quit smoking - this is the single most important step for heart health")
-        
-        if user_data.get("exercise_frequency") in ["never", "rarely"]:
-            recommendations.append("Start with 30 minutes of moderate exercise 5 days per week")
+    for threshold, tier_recs in _RECS.get(disease_type, ()):
+        if risk_score > threshold:
+            recommendations.extend(tier_recs)
+            break
     
-    elif disease_type == "diabetes":
-        if risk_score > 0.7:
-            recommendations.extend([
-                "Consult with an endocrinologist for diabetes prevention strategies",
-                "Get HbA1c and glucose tolerance testing",
-                "Consider pre-diabetes medication if recommended by your doctor"
-            ])
-        elif risk_score > 0.4:
-            recommendations.extend([
-                "Monitor blood sugar levels regularly",
-                "Adopt a low-glycemic diet with controlled carbohydrate intake",
-                "Maintain a healthy weight through diet and exercise"
-            ])
-        
-        # Weight-specific recommendations
-        if user_data.get("weight_kg") and user_data.get("height_cm"):
-            bmi = user_data["weight_kg"] / ((user_data["height_cm"] / 100) ** 2)
-            if bmi > 25:
-                recommendations.append("Focus on gradual weight loss to reduce diabetes risk")
-    
-    elif disease_type == "cancer":
-        if risk_score > 0.6:
-            recommendations.extend([
-                "Discuss cancer screening schedule with your oncologist",
-                "Consider genetic counseling if family history is significant",
-                "Maintain regular screening appointments (mammograms, colonoscopies, etc.)"
-            ])
-        
-        recommendations.extend([
-            "Maintain a diet rich in fruits, vegetables, and whole grains",
-            "Limit processed meats and alcohol consumption",
-            "Protect skin from UV exposure and avoid tobacco products"
-        ])
+    hook = _POST_HOOKS.get(disease_type)
+    if hook:
+        # Only take what still fits under the cap
+        recommendations.extend(hook(user_data)[:_MAX_RECOMMENDATIONS - len(recommendations)])
     
     # General recommendations for all diseases
     if not recommendations:
-        recommendations.extend([
-            "Maintain regular health check-ups",
-            "Follow a balanced, nutritious diet",
-            "Stay physically active with regular exercise",
-            "Manage stress through relaxation techniques or counseling"
-        ])
+        return list(_GENERAL_RECS)
     
-    return recommendations[:5]  # Limit to top 5 recommendations
+    return recommendations
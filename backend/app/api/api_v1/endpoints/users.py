@@ -2,36 +2,50 @@
 User profile and health data endpoints with Supabase integration
 """
 
-from typing import Any, Dict, List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from pydantic import BaseModel
 from datetime import datetime
+from uuid import UUID
 
-from app.core.supabase import get_supabase_client, SupabaseClient
+from app.core.supabase import get_supabase_client, SupabaseClient, RISK_PREDICTIONS_PAGE_SIZE
 from app.core.auth_middleware import get_current_user, get_user_id
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Per-user reads may be reused briefly by the browser (matches the server-side cache TTL)
+_USER_DATA_CACHE_CONTROL = "private, max-age=15"
+
+
+async def _profile_write_error(supabase: SupabaseClient, user_id: str, detail: str) -> HTTPException:
+    """404 when the user has no profile row to update, otherwise 400 for a failed write"""
+    if await supabase.get_user_profile(user_id) is None:
+        return HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
 
 class UserProfileUpdate(BaseModel):
-    full_name: str = None
-    age: int = None
-    sex: str = None
-    height_cm: float = None
-    weight_kg: float = None
-    ethnicity: str = None
+    full_name: Optional[str] = None
+    age: Optional[int] = None
+    sex: Optional[str] = None
+    height_cm: Optional[float] = None
+    weight_kg: Optional[float] = None
+    ethnicity: Optional[str] = None
 
 
 class LifestyleData(BaseModel):
-    diet_type: str = None
-    exercise_frequency: str = None
-    sleep_hours: float = None
-    tobacco_use: str = None
-    alcohol_consumption: str = None
-    occupation: str = None
-    environmental_exposures: str = None
+    diet_type: Optional[str] = None
+    exercise_frequency: Optional[str] = None
+    sleep_hours: Optional[float] = None
+    tobacco_use: Optional[str] = None
+    alcohol_consumption: Optional[str] = None
+    occupation: Optional[str] = None
+    environmental_exposures: Optional[str] = None
 
 
 class MedicalHistoryData(BaseModel):
@@ -64,12 +78,11 @@ async def get_user_profile(
     
     if not profile:
         # Create empty profile if doesn't exist
-        await supabase.create_user_profile(user_id, {
+        profile = await supabase.create_user_profile(user_id, {
             "demographics_complete": False,
             "lifestyle_complete": False,
             "medical_history_complete": False
-        })
-        profile = await supabase.get_user_profile(user_id)
+        }) or await supabase.get_user_profile(user_id)
     
     return {"profile": profile}
 
@@ -83,20 +96,17 @@ async def update_demographics(
     """
     Update user demographic information
     """
-    # Prepare update data (only include non-None values)
-    update_data = {k: v for k, v in profile_data.dict().items() if v is not None}
+    # Prepare update data (only include non-None values);
+    # updated_at is set by the update_user_profiles_updated_at trigger
+    update_data = profile_data.model_dump(exclude_none=True, exclude_unset=True)
     update_data["demographics_complete"] = True
-    update_data["updated_at"] = datetime.utcnow().isoformat()
     
-    success = await supabase.update_user_profile(user_id, update_data)
+    profile = await supabase.update_user_profile(user_id, update_data)
     
-    if not success:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Failed to update profile"
-        )
+    if not profile:
+        raise await _profile_write_error(supabase, user_id, "Failed to update profile")
     
-    return {"message": "Demographics updated successfully"}
+    return {"message": "Demographics updated successfully", "profile": profile}
 
 
 @router.put("/profile/lifestyle")
@@ -109,19 +119,15 @@ async def update_lifestyle(
     Update user lifestyle information
     """
     # Prepare update data (only include non-None values)
-    update_data = {k: v for k, v in lifestyle_data.dict().items() if v is not None}
+    update_data = lifestyle_data.model_dump(exclude_none=True, exclude_unset=True)
     update_data["lifestyle_complete"] = True
-    update_data["updated_at"] = datetime.utcnow().isoformat()
     
-    success = await supabase.update_user_profile(user_id, update_data)
+    profile = await supabase.update_user_profile(user_id, update_data)
     
-    if not success:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Failed to update lifestyle data"
-        )
+    if not profile:
+        raise await _profile_write_error(supabase, user_id, "Failed to update lifestyle data")
     
-    return {"message": "Lifestyle data updated successfully"}
+    return {"message": "Lifestyle data updated successfully", "profile": profile}
 
 
 @router.put("/profile/medical-history")
@@ -139,19 +145,15 @@ async def update_medical_history(
         "family_history": medical_data.family_history,
         "current_symptoms": medical_data.current_symptoms,
         "medications": medical_data.medications,
-        "medical_history_complete": True,
-        "updated_at": datetime.utcnow().isoformat()
+        "medical_history_complete": True
     }
     
-    success = await supabase.update_user_profile(user_id, update_data)
+    profile = await supabase.update_user_profile(user_id, update_data)
     
-    if not success:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Failed to update medical history"
-        )
+    if not profile:
+        raise await _profile_write_error(supabase, user_id, "Failed to update medical history")
     
-    return {"message": "Medical history updated successfully"}
+    return {"message": "Medical history updated successfully", "profile": profile}
 
 
 @router.post("/lab-results")
@@ -171,8 +173,7 @@ async def add_lab_result(
         "test_date": lab_data.test_date.isoformat(),
         "lab_name": lab_data.lab_name,
         "doctor_name": lab_data.doctor_name,
-        "notes": lab_data.notes,
-        "created_at": datetime.utcnow().isoformat()
+        "notes": lab_data.notes
     }
     
     success = await supabase.save_lab_result(user_id, lab_result_data)
@@ -188,6 +189,7 @@ async def add_lab_result(
 
 @router.get("/lab-results")
 async def get_lab_results(
+    response: Response,
     user_id: str = Depends(get_user_id),
     supabase: SupabaseClient = Depends(get_supabase_client)
 ) -> Dict[str, List[Dict[str, Any]]]:
@@ -195,19 +197,46 @@ async def get_lab_results(
     Get all lab results for the user
     """
     lab_results = await supabase.get_lab_results(user_id)
+    response.headers["Cache-Control"] = _USER_DATA_CACHE_CONTROL
     return {"lab_results": lab_results}
 
 
+def _parse_prediction_cursor(cursor: str) -> Tuple[str, str]:
+    """'<prediction_date>,<id>' -> (prediction_date, id), validating both parts"""
+    prediction_date, _, prediction_id = cursor.partition(",")
+    try:
+        datetime.fromisoformat(prediction_date)
+        UUID(prediction_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+    return prediction_date, prediction_id
+
+
 @router.get("/risk-predictions")
 async def get_risk_predictions(
+    response: Response,
+    limit: int = Query(RISK_PREDICTIONS_PAGE_SIZE, ge=1, le=200),
+    before: Optional[str] = None,
     user_id: str = Depends(get_user_id),
     supabase: SupabaseClient = Depends(get_supabase_client)
-) -> Dict[str, List[Dict[str, Any]]]:
+) -> Dict[str, Any]:
     """
-    Get all risk predictions for the user
+    Get the user's risk predictions, newest first, one page at a time
+    
+    `next_before` is the cursor for the following page (null on the last page):
+    the last row's prediction_date and id, joined by a comma.
     """
-    predictions = await supabase.get_risk_predictions(user_id)
-    return {"predictions": predictions}
+    cursor = _parse_prediction_cursor(before) if before is not None else None
+    predictions = await supabase.get_risk_predictions(user_id, limit=limit, before=cursor)
+    next_before = None
+    if len(predictions) == limit:
+        last = predictions[-1]
+        next_before = f"{last['prediction_date']},{last['id']}"
+    response.headers["Cache-Control"] = _USER_DATA_CACHE_CONTROL
+    return {"predictions": predictions, "next_before": next_before}
 
 
 @router.delete("/profile")
@@ -221,16 +250,8 @@ async def delete_user_profile(
     user_id = current_user["id"]
     
     try:
-        # Delete from all tables
-        if supabase.client:
-            # Delete lab results
-            supabase.client.table('lab_results').delete().eq('user_id', user_id).execute()
-            
-            # Delete risk predictions
-            supabase.client.table('risk_predictions').delete().eq('user_id', user_id).execute()
-            
-            # Delete user profile
-            supabase.client.table('user_profiles').delete().eq('user_id', user_id).execute()
+        # Delete from all tables in one transaction
+        await supabase.delete_user_data(user_id)
         
         return {"message": "Profile deleted successfully"}
         
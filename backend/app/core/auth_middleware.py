@@ -5,31 +5,121 @@ Authentication middleware for Supabase integration
 from typing import Optional, Dict, Any
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from app.core.supabase import get_supabase_client, SupabaseClient
+from cachetools import TTLCache
+import jwt
+from app.core.config import settings
+from app.core.supabase import get_supabase_client
+import hashlib
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
-# Security scheme for Bearer token
-security = HTTPBearer()
+# Bearer scheme for OpenAPI (Swagger's Authorize button); a missing header is
+# answered by get_current_user with 401 rather than by HTTPBearer with 403
+security = HTTPBearer(auto_error=False)
 
+# Verified users keyed by a BLAKE2b digest of the token (raw tokens are never stored)
+_token_cache: TTLCache = TTLCache(
+    maxsize=settings.JWT_CACHE_MAX_ENTRIES,
+    ttl=settings.JWT_CACHE_TTL_SECONDS
+)
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    supabase: SupabaseClient = Depends(get_supabase_client)
-) -> Dict[str, Any]:
+
+def _token_cache_key(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+def _token_expiry(token: str) -> float:
+    """Upper bound for how long a verification result may be reused"""
+    expires_at = time.time() + settings.JWT_CACHE_TTL_SECONDS
+    try:
+        exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+        if exp:
+            expires_at = min(expires_at, float(exp))
+    except Exception:
+        pass
+    return expires_at
+
+
+def _verify_token_locally(token: str) -> Optional[Dict[str, Any]]:
     """
-    Dependency to get current authenticated user from Supabase token
+    Check the token's HS256 signature with the project JWT secret.
+
+    Returns None when no secret is configured or the token does not
+    validate, leaving the decision to Supabase.
     """
-    if not credentials:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Authentication credentials required",
-            headers={"WWW-Authenticate": "Bearer"},
+    if not settings.SUPABASE_JWT_SECRET:
+        return None
+    
+    try:
+        payload = jwt.decode(
+            token,
+            settings.SUPABASE_JWT_SECRET,
+            algorithms=["HS256"],
+            audience="authenticated"
         )
+    except jwt.PyJWTError:
+        return None
+    
+    return {
+        "id": payload["sub"],
+        "email": payload.get("email"),
+        "user_metadata": payload.get("user_metadata", {}),
+        "app_metadata": payload.get("app_metadata", {}),
+        "created_at": None,
+        "updated_at": None
+    }
+
+
+async def verify_token_cached(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Verify a Supabase token, reusing recent successful verifications.
+
+    Failed verifications are never cached so a fixed token is accepted
+    on the next request.
+    """
+    key = _token_cache_key(token)
+    entry = _token_cache.get(key)
+    if entry and entry["exp"] > time.time():
+        return entry["user"]
     
-    token = credentials.credentials
-    user_data = await supabase.verify_user_token(token)
+    user_data = _verify_token_locally(token)
+    if user_data is None:
+        user_data = await get_supabase_client().verify_user_token(token)
+    if user_data:
+        _token_cache[key] = {"user": user_data, "exp": _token_expiry(token)}
+    return user_data
+
+
+def forget_token(token: str) -> None:
+    """Drop a cached verification, e.g. when the user logs out"""
+    _token_cache.pop(_token_cache_key(token), None)
+
+
+async def _authenticate(credentials: Optional[HTTPAuthorizationCredentials]) -> Optional[Dict[str, Any]]:
+    """The verified user for the request's bearer token, or None"""
+    if credentials is None:
+        return None
+    try:
+        return await verify_token_cached(credentials.credentials)
+    except Exception as e:
+        logger.warning(f"Token verification error: {e}")
+        return None
+
+
+async def get_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
+) -> Dict[str, Any]:
+    """
+    Dependency to get current authenticated user.
+
+    The token is verified only for routes that depend on this, and once per
+    request (FastAPI caches dependency results). A missing Authorization
+    header is answered with 401 like an invalid token (HTTPBearer used to
+    send 403).
+    """
+    user_data = await _authenticate(credentials)
     
     if not user_data:
         raise HTTPException(
@@ -53,7 +143,9 @@ async def get_current_active_user(
     return current_user
 
 
-def get_user_id(current_user: Dict[str, Any] = Depends(get_current_user)) -> str:
+async def get_user_id(
+    current_user: Dict[str, Any] = Depends(get_current_user)
+) -> str:
     """
     Dependency to extract user ID from current user
     """
@@ -61,22 +153,12 @@ def get_user_id(current_user: Dict[str, Any] = Depends(get_current_user)) -> str
 
 
 async def optional_auth(
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
-    supabase: SupabaseClient = Depends(get_supabase_client)
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
 ) -> Optional[Dict[str, Any]]:
     """
     Optional authentication dependency - returns user if authenticated, None otherwise
     """
-    if not credentials:
-        return None
-    
-    try:
-        token = credentials.credentials
-        user_data = await supabase.verify_user_token(token)
-        return user_data
-    except Exception as e:
-        logger.warning(f"Optional auth failed: {e}")
-        return None
+    return await _authenticate(credentials)
 
 
 class AuthenticationError(Exception):
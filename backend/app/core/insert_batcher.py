@@ -0,0 +1,112 @@
+"""
+Coalesces concurrent single-row inserts into multi-row INSERTs
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+Row = Dict[str, Any]
+
+
+class InsertBatcher:
+    """
+    Write-behind buffer for one table.
+
+    `insert()` queues a row and waits until it has been written, so callers
+    still get an acknowledgement. A single background task writes whatever
+    has queued up since the previous write (up to `max_batch` rows) with one
+    call to `write_rows`; under concurrent load rows coalesce naturally and
+    an idle system adds no delay.
+
+    If a multi-row write fails with one of `unwritten_errors` (errors that
+    guarantee nothing was stored, e.g. the request was never sent), the rows
+    are retried one by one so a single bad row only fails its own caller.
+    Any other error fails the whole batch: after a read timeout the rows
+    may already be committed, and retrying them would store duplicates.
+    """
+
+    def __init__(
+        self,
+        write_rows: Callable[[List[Row]], Awaitable[Any]],
+        max_batch: int = 500,
+        unwritten_errors: Tuple[Type[BaseException], ...] = ()
+    ):
+        self._write_rows = write_rows
+        self._max_batch = max_batch
+        self._unwritten_errors = unwritten_errors
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+        return self._queue
+
+    async def insert(self, row: Row) -> None:
+        """Queue a row and wait for it to be written; raises if the write failed"""
+        queue = self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        queue.put_nowait((row, future))
+        await future
+
+    async def _run(self) -> None:
+        queue = self._queue
+        while True:
+            batch: List[Tuple[Row, asyncio.Future]] = [await queue.get()]
+            while len(batch) < self._max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _flush(self, batch: List[Tuple[Row, asyncio.Future]]) -> None:
+        try:
+            await self._write_rows([row for row, _ in batch])
+        except Exception as e:
+            if len(batch) == 1 or not isinstance(e, self._unwritten_errors):
+                for _, future in batch:
+                    _settle(future, e)
+                return
+            logger.warning(f"Batched insert of {len(batch)} rows failed, retrying individually: {e}")
+            for row, future in batch:
+                try:
+                    await self._write_rows([row])
+                except Exception as row_error:
+                    _settle(future, row_error)
+                else:
+                    _settle(future)
+            return
+
+        for _, future in batch:
+            _settle(future)
+
+    async def close(self) -> None:
+        """Write everything still queued, then stop the worker"""
+        if self._task is None or self._task.done():
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+def _settle(future: asyncio.Future, error: Optional[Exception] = None) -> None:
+    # The waiting request may have been cancelled (client disconnected)
+    if future.done():
+        return
+    if error is None:
+        future.set_result(None)
+    else:
+        future.set_exception(error)
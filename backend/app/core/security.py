@@ -3,27 +3,48 @@ Security utilities for the Disease Risk Prediction API
 """
 
 from datetime import datetime, timedelta
+import functools
+import json
 from typing import Any, Union, Optional
 
-from jose import jwt
+import jwt
 from passlib.context import CryptContext
 from cryptography.fernet import Fernet
 
 from app.core.config import settings
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing: argon2id for new hashes; existing bcrypt hashes still verify
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__time_cost=2,
+    argon2__memory_cost=64 * 1024,
+    argon2__parallelism=2,
+    bcrypt__rounds=10
+)
 
 # Encryption for sensitive data
+@functools.lru_cache(maxsize=1)
 def get_encryption_key() -> bytes:
-    """Get or generate encryption key for sensitive data"""
+    """Get the encryption key for sensitive data (resolved once per process)"""
     if settings.ENCRYPTION_KEY:
         return settings.ENCRYPTION_KEY.encode()
-    else:
-        # Generate a new key (in production, this should be stored securely)
-        return Fernet.generate_key()
+    if settings.ENVIRONMENT != "development":
+        # A generated key would make previously stored ciphertexts undecryptable
+        raise RuntimeError("ENCRYPTION_KEY must be set outside development")
+    # Throwaway key for local development only
+    return Fernet.generate_key()
+
+
+@functools.lru_cache(maxsize=1)
+def get_fernet() -> Fernet:
+    """Shared Fernet instance, created on first use so importing this module never needs the key"""
+    return Fernet(get_encryption_key())
+
 
-fernet = Fernet(get_encryption_key())
+# Signing key and algorithm resolved once rather than looked up on every call
+_SIGNING_KEY = settings.SECRET_KEY
+_ALGORITHMS = [settings.ALGORITHM]
 
 
 def create_access_token(
@@ -36,16 +57,16 @@ def create_access_token(
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _SIGNING_KEY, algorithm=_ALGORITHMS[0])
     return encoded_jwt
 
 
 def verify_token(token: str) -> Optional[dict]:
     """Verify JWT token and return payload"""
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = jwt.decode(token, _SIGNING_KEY, algorithms=_ALGORITHMS)
         return payload
-    except jwt.JWTError:
+    except jwt.PyJWTError:
         return None
 
 
@@ -63,13 +84,14 @@ def encrypt_sensitive_data(data: str) -> str:
     """Encrypt sensitive data for database storage"""
     if not data:
         return data
-    return fernet.encrypt(data.encode()).decode()
+    return get_fernet().encrypt(data.encode()).decode()
 
 
 def decrypt_sensitive_data(encrypted_data: str) -> str:
     """Decrypt sensitive data from database"""
     if not encrypted_data:
         return encrypted_data
+    fernet = get_fernet()
     try:
         return fernet.decrypt(encrypted_data.encode()).decode()
     except Exception:
@@ -79,7 +101,6 @@ def decrypt_sensitive_data(encrypted_data: str) -> str:
 
 def encrypt_json_data(data: dict) -> str:
     """Encrypt JSON data for database storage"""
-    import json
     if not data:
         return ""
     json_str = json.dumps(data)
@@ -88,7 +109,6 @@ def encrypt_json_data(data: dict) -> str:
 
 def decrypt_json_data(encrypted_data: str) -> dict:
     """Decrypt JSON data from database"""
-    import json
     if not encrypted_data:
         return {}
     try:
@@ -2,29 +2,89 @@
 Supabase client configuration and utilities
 """
 
-from typing import Optional, Dict, Any
-from supabase import create_client, Client
+from typing import Optional, Dict, Any, AsyncIterator, List, Tuple
+from cachetools import TTLCache
+# supabase==2.3.4 (pinned) only exports the sync client from the package root
+from supabase._async.client import AsyncClient, create_client as acreate_client
+from postgrest.exceptions import APIError
+from postgrest.types import ReturnMethod
 from app.core.config import settings
+from app.core.insert_batcher import InsertBatcher
+import functools
+import httpx
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Failures to establish a connection; the request never reached PostgREST, so
+# retrying cannot duplicate a write
+_TRANSIENT_HTTP_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+# Failed inserts that certainly stored nothing: the request was never sent, or
+# PostgREST rejected the statement (which rolls back as a whole)
+_UNWRITTEN_INSERT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout, APIError)
+
+# Risk prediction columns the dashboard lists (features_used and bookkeeping columns are left out)
+_RISK_PREDICTION_COLUMNS = (
+    'id,disease_name,risk_score,risk_category,confidence_score,'
+    'model_version,recommendations,prediction_date'
+)
+RISK_PREDICTIONS_PAGE_SIZE = 50
+
 
 class SupabaseClient:
-    """Supabase client wrapper for database operations"""
+    """
+    Supabase client wrapper for database operations
+
+    Uses supabase-py's async client, which is created by `connect()` at
+    application startup; until then the wrapper reports not connected.
+    """
     
     def __init__(self):
-        self._client: Optional[Client] = None
+        self._client: Optional[AsyncClient] = None
+        self._auth_http: Optional[httpx.AsyncClient] = None
+        self._profile_cache: TTLCache = TTLCache(
+            maxsize=settings.PROFILE_CACHE_MAX_ENTRIES,
+            ttl=settings.PROFILE_CACHE_TTL_SECONDS
+        )
+        # Per-user read results keyed by (kind, user_id); dropped on writes
+        self._user_data_cache: TTLCache = TTLCache(
+            maxsize=settings.USER_DATA_CACHE_MAX_ENTRIES,
+            ttl=settings.USER_DATA_CACHE_TTL_SECONDS
+        )
+        # Lab result writes from concurrent requests are coalesced into one INSERT
+        self._lab_result_writer = InsertBatcher(
+            lambda rows: self._insert_rows('lab_results', rows),
+            unwritten_errors=_UNWRITTEN_INSERT_ERRORS
+        )
         self._initialize_client()
     
     def _initialize_client(self):
-        """Initialize Supabase client"""
+        """Set up the pooled HTTP client for GoTrue calls"""
         if not settings.SUPABASE_URL or not settings.SUPABASE_KEY:
             logger.warning("Supabase credentials not configured")
             return
         
+        # Pooled async client for GoTrue calls made on the request path
+        self._auth_http = httpx.AsyncClient(
+            base_url=f"{settings.SUPABASE_URL.rstrip('/')}/auth/v1",
+            headers={"apikey": settings.SUPABASE_KEY},
+            limits=httpx.Limits(
+                max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.SUPABASE_MAX_CONNECTIONS // 2,
+                keepalive_expiry=60
+            ),
+            transport=httpx.AsyncHTTPTransport(retries=settings.SUPABASE_QUERY_RETRIES),
+            timeout=10.0
+        )
+    
+    async def connect(self) -> None:
+        """Create the async Supabase client (once, at application startup)"""
+        if self._client is not None or self._auth_http is None:
+            return
+        
         try:
-            self._client = create_client(
+            self._client = await acreate_client(
                 settings.SUPABASE_URL,
                 settings.SUPABASE_KEY
             )
@@ -33,7 +93,7 @@ class SupabaseClient:
             logger.error(f"Failed to initialize Supabase client: {e}")
     
     @property
-    def client(self) -> Optional[Client]:
+    def client(self) -> Optional[AsyncClient]:
         """Get Supabase client instance"""
         return self._client
     
@@ -41,13 +101,73 @@ class SupabaseClient:
         """Check if Supabase client is connected"""
         return self._client is not None
     
+    async def _execute(self, query):
+        """
+        Execute a PostgREST query, retrying connection failures up to
+        SUPABASE_QUERY_RETRIES times
+        """
+        for attempt in range(settings.SUPABASE_QUERY_RETRIES + 1):
+            try:
+                return await query.execute()
+            except _TRANSIENT_HTTP_ERRORS as e:
+                if attempt == settings.SUPABASE_QUERY_RETRIES:
+                    raise
+                logger.warning(f"Retrying Supabase query after transport error: {e}")
+    
+    async def _insert_rows(self, table: str, rows: List[Dict[str, Any]]) -> None:
+        await self._execute(self._client.table(table).insert(rows, returning=ReturnMethod.minimal))
+    
+    async def close(self) -> None:
+        """Flush queued writes and close pooled HTTP connections"""
+        await self._lab_result_writer.close()
+        if self._auth_http is not None:
+            await self._auth_http.aclose()
+        if self._client is not None:
+            await self._client.postgrest.aclose()
+    
+    async def _auth_post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST to the GoTrue API and return the decoded body, raising on errors"""
+        response = await self._auth_http.post(path, json=payload)
+        body = response.json() if response.content else {}
+        if response.is_error:
+            message = (
+                body.get("error_description") or body.get("msg")
+                or body.get("message") or response.reason_phrase
+            )
+            raise ValueError(message)
+        return body
+    
+    async def sign_in_with_password(self, email: str, password: str) -> Dict[str, Any]:
+        """Exchange email/password for a session (access/refresh tokens and user)"""
+        return await self._auth_post(
+            "/token?grant_type=password",
+            {"email": email, "password": password}
+        )
+    
+    async def refresh_session(self, refresh_token: str) -> Dict[str, Any]:
+        """Exchange a refresh token for a new session"""
+        return await self._auth_post(
+            "/token?grant_type=refresh_token",
+            {"refresh_token": refresh_token}
+        )
+    
+    async def sign_up(self, email: str, password: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Create an auth user; returns the user, or a session containing it
+        when email confirmation is disabled
+        """
+        return await self._auth_post(
+            "/signup",
+            {"email": email, "password": password, "data": data}
+        )
+    
     async def verify_user_token(self, token: str) -> Optional[Dict[str, Any]]:
         """Verify Supabase user token and return user data"""
         if not self._client:
             return None
         
         try:
-            response = self._client.auth.get_user(token)
+            response = await self._client.auth.get_user(token)
             if response.user:
                 return {
                     "id": response.user.id,
@@ -62,46 +182,79 @@ class SupabaseClient:
         
         return None
     
-    async def create_user_profile(self, user_id: str, profile_data: Dict[str, Any]) -> bool:
-        """Create user profile in Supabase"""
+    def invalidate_user_profile(self, user_id: str) -> None:
+        """Drop the cached profile for a user after it changes"""
+        self._profile_cache.pop(user_id, None)
+    
+    def _invalidate_user_data(self, user_id: str, *kinds: str) -> None:
+        for kind in kinds:
+            self._user_data_cache.pop((kind, user_id), None)
+    
+    async def delete_user_data(self, user_id: str) -> None:
+        """Delete the user's lab results, predictions and profile atomically"""
         if not self._client:
-            return False
+            return
+        
+        await self._execute(self._client.rpc('delete_user_cascade', {'uid': user_id}))
+        self.invalidate_user_profile(user_id)
+        self._invalidate_user_data(user_id, 'lab_results', 'risk_predictions', 'latest_predictions')
+    
+    async def create_user_profile(self, user_id: str, profile_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Create user profile in Supabase and return the stored row"""
+        if not self._client:
+            return None
         
         try:
-            result = self._client.table('user_profiles').insert({
+            result = await self._execute(self._client.table('user_profiles').insert({
                 'user_id': user_id,
                 **profile_data
-            }).execute()
-            return len(result.data) > 0
+            }))
+            return self._cache_profile_row(user_id, result.data)
         except Exception as e:
             logger.error(f"Failed to create user profile: {e}")
-            return False
+            self.invalidate_user_profile(user_id)
+            return None
     
     async def get_user_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Get user profile from Supabase"""
         if not self._client:
             return None
         
+        cached = self._profile_cache.get(user_id)
+        if cached is not None:
+            return cached
+        
         try:
-            result = self._client.table('user_profiles').select('*').eq('user_id', user_id).execute()
+            result = await self._execute(self._client.table('user_profiles').select('*').eq('user_id', user_id))
             if result.data:
+                self._profile_cache[user_id] = result.data[0]
                 return result.data[0]
         except Exception as e:
             logger.error(f"Failed to get user profile: {e}")
         
         return None
     
-    async def update_user_profile(self, user_id: str, profile_data: Dict[str, Any]) -> bool:
-        """Update user profile in Supabase"""
+    async def update_user_profile(self, user_id: str, profile_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update user profile in Supabase and return the updated row"""
         if not self._client:
-            return False
+            return None
         
         try:
-            result = self._client.table('user_profiles').update(profile_data).eq('user_id', user_id).execute()
-            return len(result.data) > 0
+            result = await self._execute(self._client.table('user_profiles').update(profile_data).eq('user_id', user_id))
+            return self._cache_profile_row(user_id, result.data)
         except Exception as e:
             logger.error(f"Failed to update user profile: {e}")
-            return False
+            self.invalidate_user_profile(user_id)
+            return None
+    
+    def _cache_profile_row(self, user_id: str, rows: Optional[List[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        # Writes return the stored row (PostgREST return=representation), so the
+        # next get_user_profile is served from cache instead of another round trip
+        if not rows:
+            self.invalidate_user_profile(user_id)
+            return None
+        self._profile_cache[user_id] = rows[0]
+        return rows[0]
     
     async def save_lab_result(self, user_id: str, lab_data: Dict[str, Any]) -> bool:
         """Save lab result to Supabase"""
@@ -109,11 +262,12 @@ class SupabaseClient:
             return False
         
         try:
-            result = self._client.table('lab_results').insert({
+            await self._lab_result_writer.insert({
                 'user_id': user_id,
                 **lab_data
-            }).execute()
-            return len(result.data) > 0
+            })
+            self._invalidate_user_data(user_id, 'lab_results')
+            return True
         except Exception as e:
             logger.error(f"Failed to save lab result: {e}")
             return False
@@ -123,45 +277,115 @@ class SupabaseClient:
         if not self._client:
             return []
         
+        cached = self._user_data_cache.get(('lab_results', user_id))
+        if cached is not None:
+            return cached
+        
         try:
-            result = self._client.table('lab_results').select('*').eq('user_id', user_id).execute()
+            result = await self._execute(self._client.table('lab_results').select('*').eq('user_id', user_id))
+            self._user_data_cache[('lab_results', user_id)] = result.data or []
             return result.data or []
         except Exception as e:
             logger.error(f"Failed to get lab results: {e}")
             return []
     
-    async def save_risk_prediction(self, user_id: str, prediction_data: Dict[str, Any]) -> bool:
-        """Save risk prediction to Supabase"""
+    async def get_risk_predictions(
+        self,
+        user_id: str,
+        limit: int = RISK_PREDICTIONS_PAGE_SIZE,
+        before: Optional[Tuple[str, str]] = None
+    ) -> list:
+        """
+        Get one page of a user's risk predictions, newest first
+        
+        Pass the (prediction_date, id) of the last row as `before` to fetch the
+        next page (keyset pagination on the (user_id, prediction_date, id)
+        index). id breaks ties between rows inserted in the same statement,
+        which share a prediction_date. Only the default first page is cached.
+        """
         if not self._client:
-            return False
+            return []
+        
+        cacheable = before is None and limit == RISK_PREDICTIONS_PAGE_SIZE
+        if cacheable:
+            cached = self._user_data_cache.get(('risk_predictions', user_id))
+            if cached is not None:
+                return cached
         
         try:
-            result = self._client.table('risk_predictions').insert({
-                'user_id': user_id,
-                **prediction_data
-            }).execute()
-            return len(result.data) > 0
+            query = (
+                self._client.table('risk_predictions')
+                .select(_RISK_PREDICTION_COLUMNS)
+                .eq('user_id', user_id)
+            )
+            if before is not None:
+                before_date, before_id = before
+                query = query.or_(
+                    f'prediction_date.lt."{before_date}",'
+                    f'and(prediction_date.eq."{before_date}",id.lt."{before_id}")'
+                )
+            query = query.order('prediction_date', desc=True).order('id', desc=True)
+            result = await self._execute(query.limit(limit))
+            if cacheable:
+                self._user_data_cache[('risk_predictions', user_id)] = result.data or []
+            return result.data or []
         except Exception as e:
-            logger.error(f"Failed to save risk prediction: {e}")
-            return False
+            logger.error(f"Failed to get risk predictions: {e}")
+            return []
+
     
-    async def get_risk_predictions(self, user_id: str) -> list:
-        """Get risk predictions for user from Supabase"""
+    async def iter_risk_predictions(self, user_id: str, page_size: int = 100) -> AsyncIterator[Dict[str, Any]]:
+        """Yield a user's risk predictions newest first, fetching one page at a time"""
+        if not self._client:
+            return
+        
+        start = 0
+        while True:
+            try:
+                query = (
+                    self._client.table('risk_predictions')
+                    .select('*')
+                    .eq('user_id', user_id)
+                    .order('prediction_date', desc=True)
+                    .order('id', desc=True)
+                    .range(start, start + page_size - 1)
+                )
+                result = await self._execute(query)
+            except Exception as e:
+                logger.error(f"Failed to get risk predictions page: {e}")
+                return
+            
+            rows = result.data or []
+            for row in rows:
+                yield row
+            if len(rows) < page_size:
+                return
+            start += page_size
+    
+    async def get_latest_predictions_per_disease(self, user_id: str) -> list:
+        """Get the most recent risk prediction for each disease (DISTINCT ON in Postgres)"""
         if not self._client:
             return []
         
+        cached = self._user_data_cache.get(('latest_predictions', user_id))
+        if cached is not None:
+            return cached
+        
         try:
-            result = self._client.table('risk_predictions').select('*').eq('user_id', user_id).order('prediction_date', desc=True).execute()
+            result = await self._execute(self._client.rpc('get_latest_predictions_per_disease', {'user_uuid': user_id}))
+            self._user_data_cache[('latest_predictions', user_id)] = result.data or []
             return result.data or []
         except Exception as e:
-            logger.error(f"Failed to get risk predictions: {e}")
+            logger.error(f"Failed to get latest risk predictions: {e}")
             return []
 
 
-# Global Supabase client instance
-supabase_client = SupabaseClient()
+@functools.lru_cache(maxsize=1)
+def get_supabase_client() -> SupabaseClient:
+    """Dependency to get the process-wide Supabase client (created once)"""
+    return SupabaseClient()
 
 
-def get_supabase_client() -> SupabaseClient:
-    """Dependency to get Supabase client"""
-    return supabase_client
+# Global Supabase client instance, for use outside request handlers (e.g. background tasks)
+SUPABASE = get_supabase_client()
+supabase_client = SUPABASE
@@ -4,28 +4,40 @@ Disease Risk Prediction App - Main FastAPI Application
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+import logging
 import uvicorn
 
 from app.core.config import settings
+from app.core.supabase import get_supabase_client
+from app.api.api_v1.endpoints.predictions import close_groq_service
 from app.api.api_v1.api import api_router
 
+logger = logging.getLogger(__name__)
+
 # Create FastAPI instance
 app = FastAPI(
     title="Disease Risk Prediction API",
     description="A comprehensive API for disease risk assessment and health prediction",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
-# Configure CORS
+# Compress larger payloads (prediction responses carry long recommendation text)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# Configure CORS; browsers may reuse a preflight result for a day
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_HOSTS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_headers=["Authorization", "Content-Type", "Accept", "If-None-Match"],
+    expose_headers=["ETag"],
+    max_age=86400,
 )
 
 # Include API router
@@ -46,18 +58,36 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "disease-risk-api"}
 
-# Global exception handler
+@app.on_event("startup")
+async def connect_supabase():
+    """Create the async Supabase client inside the running event loop"""
+    await get_supabase_client().connect()
+
+@app.on_event("shutdown")
+async def close_http_connections():
+    """Release pooled Supabase and Groq HTTP connections"""
+    await get_supabase_client().close()
+    await close_groq_service()
+
+# Global exception handler; details stay in the server log, never in the response
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
-    return JSONResponse(
+    logger.exception(f"Unhandled error on {request.method} {request.url.path}")
+    return ORJSONResponse(
         status_code=500,
-        content={"detail": "Internal server error", "error": str(exc)}
+        content={"detail": "Internal server error"}
     )
 
 if __name__ == "__main__":
+    # loop/http "auto" pick uvloop and httptools (installed by uvicorn[standard])
+    # and fall back to asyncio/h11 where they are unavailable, e.g. on Windows
     uvicorn.run(
         "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True
+        host=settings.HOST,
+        port=settings.PORT,
+        reload=settings.DEBUG,
+        workers=1 if settings.DEBUG else settings.WORKERS,
+        loop="auto",
+        http="auto",
+        backlog=settings.BACKLOG
     )
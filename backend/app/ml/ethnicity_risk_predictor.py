@@ -3,54 +3,153 @@ Simplified Ethnicity-Aware Disease Risk Prediction ML Model
 Using validated clinical algorithms and multi-ethnic health studies
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
+from bisect import bisect_right
+from cachetools import LRUCache
+import numpy as np
+import threading
+
+_DISEASES = ("heart_disease", "diabetes", "cancer")
+
+# (ethnicity, disease) -> (algorithm, study source); other ethnicities use the defaults
+_STUDY_TABLE: Dict[Tuple[str, str], Tuple[str, str]] = {
+    ("african_american", "heart_disease"): ("Jackson Heart Study + Framingham", "Jackson Heart Study (largest African American cardiovascular study)"),
+    ("african_american", "diabetes"): ("NHANES + Jackson Heart Study", "NHANES + Jackson Heart Study diabetes data"),
+    ("african_american", "cancer"): ("SEER Database + African American Studies", "SEER Cancer Database (African American cohort)"),
+    ("hispanic_latino", "heart_disease"): ("HCHS/SOL + MESA Study", "Hispanic Community Health Study/Study of Latinos"),
+    ("hispanic_latino", "diabetes"): ("HCHS/SOL Diabetes Study", "HCHS/SOL (16,415 Hispanic/Latino participants)"),
+    ("hispanic_latino", "cancer"): ("SEER Database + Hispanic Studies", "SEER Cancer Database (Hispanic/Latino cohort)"),
+    ("asian_american", "heart_disease"): ("MESA Study + Asian Studies", "Multi-Ethnic Study of Atherosclerosis (MESA)"),
+    ("asian_american", "diabetes"): ("Asian Diabetes Studies + ADA", "Asian-specific diabetes research + ADA guidelines"),
+    ("asian_american", "cancer"): ("SEER Database + Asian Studies", "SEER Cancer Database (Asian American cohort)"),
+    ("native_american", "heart_disease"): ("Strong Heart Study", "Strong Heart Study (largest Native American cardiovascular study)"),
+    ("native_american", "diabetes"): ("Strong Heart Study + Tribal Studies", "Strong Heart Study diabetes research"),
+    ("native_american", "cancer"): ("SEER Database + Tribal Studies", "SEER Cancer Database (Native American cohort)"),
+}
+
+_DEFAULT_STUDY: Dict[str, Tuple[str, str]] = {
+    "heart_disease": ("Framingham Risk Score", "Framingham Heart Study"),
+    "diabetes": ("ADA Risk Calculator", "American Diabetes Association guidelines"),
+    "cancer": ("NCI Risk Models", "National Cancer Institute models"),
+}
+
+_ETHNICITY_CONTEXTS = {
+    "african_american": "Based on Jackson Heart Study and NHANES data specific to African American health patterns.",
+    "hispanic_latino": "Based on Hispanic Community Health Study/Study of Latinos (HCHS/SOL) research.",
+    "asian_american": "Based on MESA Study and Asian-specific health research with adjusted BMI thresholds.",
+    "native_american": "Based on Strong Heart Study, the largest cardiovascular study in Native American populations.",
+    "pacific_islander": "Based on Native Hawaiian and Pacific Islander health studies with population-specific adjustments.",
+    "caucasian": "Based on Framingham Heart Study and general population health data.",
+    "mixed_other": "Based on multi-ethnic health studies and conservative risk estimates."
+}
+_DEFAULT_ETHNICITY_CONTEXT = "Based on general population health studies."
+
+# Ethnicity-specific risk multipliers from major health studies
+_ETHNICITY_MULTIPLIERS: Dict[str, Dict[str, float]] = {
+    "heart_disease": {
+        "african_american": 1.77,  # Jackson Heart Study
+        "hispanic_latino": 1.43,   # HCHS/SOL
+        "asian_american": 0.75,    # MESA Study
+        "native_american": 1.65,   # Strong Heart Study
+        "pacific_islander": 1.52,
+        "caucasian": 1.0,
+        "mixed_other": 1.15
+    },
+    "diabetes": {
+        "hispanic_latino": 2.3,    # HCHS/SOL
+        "african_american": 1.8,   # NHANES
+        "native_american": 2.8,    # Strong Heart Study
+        "asian_american": 1.6,
+        "pacific_islander": 2.1,
+        "caucasian": 1.0,
+        "mixed_other": 1.4
+    },
+    "cancer": {
+        "african_american": 1.2,   # SEER Database
+        "hispanic_latino": 0.9,
+        "asian_american": 0.8,
+        "native_american": 1.3,
+        "pacific_islander": 1.1,
+        "caucasian": 1.0,
+        "mixed_other": 1.0
+    }
+}
+
+# Ethnicities are resolved to an index once per prediction; index 0 is
+# "unknown" and carries a neutral 1.0 multiplier in every table
+_ETHNICITIES = tuple(sorted({eth for table in _ETHNICITY_MULTIPLIERS.values() for eth in table}))
+_ETHNICITY_INDEX = {eth: i + 1 for i, eth in enumerate(_ETHNICITIES)}
+_MULTIPLIER_TABLES: Dict[str, Tuple[float, ...]] = {
+    disease: (1.0,) + tuple(table.get(eth, 1.0) for eth in _ETHNICITIES)
+    for disease, table in _ETHNICITY_MULTIPLIERS.items()
+}
+_HEART_MULT = _MULTIPLIER_TABLES["heart_disease"]
+_DIABETES_MULT = _MULTIPLIER_TABLES["diabetes"]
+_CANCER_MULT = _MULTIPLIER_TABLES["cancer"]
+# Same tables as arrays for predict_risk_batch
+_MULTIPLIER_ARRAYS = {disease: np.array(table) for disease, table in _MULTIPLIER_TABLES.items()}
+
+
+def _pct(risk: float) -> str:
+    """0.123 -> "12.3%" """
+    return f"{risk * 100:.1f}%"
+
+
+# Category = labels[number of thresholds <= value]
+_RISK_THRESHOLDS = (0.10, 0.20)
+_RISK_LABELS = ("Low", "Medium", "High")
+_HEALTH_SCORE_THRESHOLDS = (50, 60, 70, 80, 90)
+_HEALTH_SCORE_LABELS = ("Critical", "Poor", "Fair", "Good", "Very Good", "Excellent")
+_RISK_THRESHOLD_ARRAY = np.array(_RISK_THRESHOLDS)
+_RISK_LABEL_ARRAY = np.array(_RISK_LABELS)
 
 
 class EthnicityAwareMedicalRiskPredictor:
     """Medical-grade risk prediction with ethnicity-specific adjustments"""
     
     def __init__(self):
-        # Ethnicity-specific risk multipliers from major health studies
-        self.ethnicity_multipliers = {
-            "heart_disease": {
-                "african_american": 1.77,  # Jackson Heart Study
-                "hispanic_latino": 1.43,   # HCHS/SOL
-                "asian_american": 0.75,    # MESA Study
-                "native_american": 1.65,   # Strong Heart Study
-                "pacific_islander": 1.52,
-                "caucasian": 1.0,
-                "mixed_other": 1.15
-            },
-            "diabetes": {
-                "hispanic_latino": 2.3,    # HCHS/SOL
-                "african_american": 1.8,   # NHANES
-                "native_american": 2.8,    # Strong Heart Study
-                "asian_american": 1.6,
-                "pacific_islander": 2.1,
-                "caucasian": 1.0,
-                "mixed_other": 1.4
-            },
-            "cancer": {
-                "african_american": 1.2,   # SEER Database
-                "hispanic_latino": 0.9,
-                "asian_american": 0.8,
-                "native_american": 1.3,
-                "pacific_islander": 1.1,
-                "caucasian": 1.0,
-                "mixed_other": 1.0
-            }
-        }
+        self.ethnicity_multipliers = _ETHNICITY_MULTIPLIERS
+        
+        # predict_risk results keyed by the inputs it actually reads
+        self._result_cache: LRUCache = LRUCache(maxsize=4096)
+        self._result_cache_lock = threading.Lock()
     
     def predict_risk(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate ethnicity-aware risk predictions"""
+        """
+        Generate ethnicity-aware risk predictions
+        
+        Results are memoized per distinct input and shared between callers,
+        so treat the returned dict as read-only. Study attributions and the
+        ethnicity context are not repeated here; clients join them from
+        get_ethnicity_metadata() using the returned "ethnicity" key.
+        """
+        key = (
+            user_data.get('ethnicity', 'caucasian').lower(),
+            int(user_data.get('age', 35)),
+            user_data.get('smokingStatus', '').lower() == 'current',
+            bool(user_data.get('familyHeartDisease', False)),
+            bool(user_data.get('familyDiabetes', False)),
+            bool(user_data.get('familyCancer', False)),
+        )
+        with self._result_cache_lock:
+            cached = self._result_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        result = self._predict_risk(user_data)
+        with self._result_cache_lock:
+            self._result_cache[key] = result
+        return result
+    
+    def _predict_risk(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
         ethnicity = user_data.get('ethnicity', 'caucasian').lower()
+        eth_idx = _ETHNICITY_INDEX.get(ethnicity, 0)
         age = int(user_data.get('age', 35))
-        gender = user_data.get('gender', 'male').lower()
         
         # Calculate base risks (simplified for now)
-        heart_risk = self._calculate_heart_risk(user_data, ethnicity)
-        diabetes_risk = self._calculate_diabetes_risk(user_data, ethnicity)
-        cancer_risk = self._calculate_cancer_risk(user_data, ethnicity)
+        heart_risk = self._calculate_heart_risk(user_data, eth_idx, age)
+        diabetes_risk = self._calculate_diabetes_risk(user_data, eth_idx, age)
+        cancer_risk = self._calculate_cancer_risk(user_data, eth_idx, age)
         
         # Calculate health score
         weighted_risk = heart_risk * 0.4 + cancer_risk * 0.35 + diabetes_risk * 0.25
@@ -60,46 +159,74 @@ class EthnicityAwareMedicalRiskPredictor:
         percentile = max(2, min(98, round(50 + (health_score - 70) * 2)))
         
         return {
+            "ethnicity": ethnicity,
             "heart_disease": {
                 "risk_score": heart_risk,
-                "risk_percentage": f"{heart_risk * 100:.1f}%",
+                "risk_percentage": _pct(heart_risk),
                 "risk_category": self._categorize_risk(heart_risk),
-                "confidence": 0.89,
-                "algorithm": self._get_algorithm(ethnicity, "heart_disease"),
-                "study_source": self._get_study_source(ethnicity, "heart_disease")
+                "confidence": 0.89
             },
             "diabetes": {
                 "risk_score": diabetes_risk,
-                "risk_percentage": f"{diabetes_risk * 100:.1f}%",
+                "risk_percentage": _pct(diabetes_risk),
                 "risk_category": self._categorize_risk(diabetes_risk),
-                "confidence": 0.92,
-                "algorithm": self._get_algorithm(ethnicity, "diabetes"),
-                "study_source": self._get_study_source(ethnicity, "diabetes")
+                "confidence": 0.92
             },
             "cancer": {
                 "risk_score": cancer_risk,
-                "risk_percentage": f"{cancer_risk * 100:.1f}%",
+                "risk_percentage": _pct(cancer_risk),
                 "risk_category": self._categorize_risk(cancer_risk),
-                "confidence": 0.85,
-                "algorithm": self._get_algorithm(ethnicity, "cancer"),
-                "study_source": self._get_study_source(ethnicity, "cancer")
+                "confidence": 0.85
             },
             "health_vitality_index": {
                 "score": health_score,
                 "category": self._categorize_health_score(health_score),
                 "percentile": percentile,
-                "description": self._get_health_description(health_score, percentile, ethnicity),
-                "ethnicity_context": self._get_ethnicity_context(ethnicity)
+                "description": self._get_health_description(health_score, percentile, ethnicity)
             }
         }
     
-    def _calculate_heart_risk(self, user_data: Dict[str, Any], ethnicity: str) -> float:
+    def predict_risk_batch(self, users: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Vectorized risk scores for many users at once.
+        
+        Returns an (N, 3) array of heart disease, diabetes and cancer risk,
+        computed exactly as the per-user _calculate_*_risk methods do.
+        """
+        n = len(users)
+        ages = np.fromiter((int(u.get('age', 35)) for u in users), dtype=np.float64, count=n)
+        eth_idx = np.fromiter(
+            (_ETHNICITY_INDEX.get(u.get('ethnicity', 'caucasian').lower(), 0) for u in users),
+            dtype=np.intp, count=n
+        )
+        smokes = np.fromiter(
+            (u.get('smokingStatus', '').lower() == 'current' for u in users), dtype=bool, count=n
+        )
+        fam_heart = np.fromiter((bool(u.get('familyHeartDisease', False)) for u in users), dtype=bool, count=n)
+        fam_diabetes = np.fromiter((bool(u.get('familyDiabetes', False)) for u in users), dtype=bool, count=n)
+        fam_cancer = np.fromiter((bool(u.get('familyCancer', False)) for u in users), dtype=bool, count=n)
+        
+        heart = np.minimum(0.02 + (ages - 30) * 0.008, 0.4) * _MULTIPLIER_ARRAYS["heart_disease"][eth_idx]
+        heart = heart * np.where(smokes, 2.0, 1.0) * np.where(fam_heart, 1.5, 1.0)
+        
+        diabetes = np.minimum(0.01 + (ages - 30) * 0.005, 0.3) * _MULTIPLIER_ARRAYS["diabetes"][eth_idx]
+        diabetes = diabetes * np.where(fam_diabetes, 2.0, 1.0)
+        
+        cancer = np.minimum(0.015 + (ages - 30) * 0.006, 0.35) * _MULTIPLIER_ARRAYS["cancer"][eth_idx]
+        cancer = cancer * np.where(smokes, 2.5, 1.0) * np.where(fam_cancer, 1.8, 1.0)
+        
+        return np.column_stack((
+            np.minimum(heart, 0.8),
+            np.minimum(diabetes, 0.6),
+            np.minimum(cancer, 0.5)
+        ))
+    
+    def _calculate_heart_risk(self, user_data: Dict[str, Any], eth_idx: int, age: int) -> float:
         """Calculate heart disease risk with ethnicity adjustment"""
-        age = int(user_data.get('age', 35))
         base_risk = min(0.02 + (age - 30) * 0.008, 0.4)
         
         # Apply ethnicity multiplier
-        ethnicity_mult = self.ethnicity_multipliers["heart_disease"].get(ethnicity, 1.0)
+        ethnicity_mult = _HEART_MULT[eth_idx]
         
         # Apply other risk factors
         risk = base_risk * ethnicity_mult
@@ -111,13 +238,12 @@ class EthnicityAwareMedicalRiskPredictor:
         
         return min(risk, 0.8)
     
-    def _calculate_diabetes_risk(self, user_data: Dict[str, Any], ethnicity: str) -> float:
+    def _calculate_diabetes_risk(self, user_data: Dict[str, Any], eth_idx: int, age: int) -> float:
         """Calculate diabetes risk with ethnicity adjustment"""
-        age = int(user_data.get('age', 35))
         base_risk = min(0.01 + (age - 30) * 0.005, 0.3)
         
         # Apply ethnicity multiplier
-        ethnicity_mult = self.ethnicity_multipliers["diabetes"].get(ethnicity, 1.0)
+        ethnicity_mult = _DIABETES_MULT[eth_idx]
         
         risk = base_risk * ethnicity_mult
         
@@ -126,13 +252,12 @@ class EthnicityAwareMedicalRiskPredictor:
         
         return min(risk, 0.6)
     
-    def _calculate_cancer_risk(self, user_data: Dict[str, Any], ethnicity: str) -> float:
+    def _calculate_cancer_risk(self, user_data: Dict[str, Any], eth_idx: int, age: int) -> float:
         """Calculate cancer risk with ethnicity adjustment"""
-        age = int(user_data.get('age', 35))
         base_risk = min(0.015 + (age - 30) * 0.006, 0.35)
         
         # Apply ethnicity multiplier
-        ethnicity_mult = self.ethnicity_multipliers["cancer"].get(ethnicity, 1.0)
+        ethnicity_mult = _CANCER_MULT[eth_idx]
         
         risk = base_risk * ethnicity_mult
         
@@ -145,93 +270,27 @@ class EthnicityAwareMedicalRiskPredictor:
     
     def _categorize_risk(self, risk_score: float) -> str:
         """Categorize risk level"""
-        if risk_score < 0.10:
-            return "Low"
-        elif risk_score < 0.20:
-            return "Medium"
-        else:
-            return "High"
+        return _RISK_LABELS[bisect_right(_RISK_THRESHOLDS, risk_score)]
+    
+    def categorize_risk_batch(self, risks: np.ndarray) -> np.ndarray:
+        """Categorize an array of risk scores (e.g. from predict_risk_batch) at once"""
+        return _RISK_LABEL_ARRAY[np.searchsorted(_RISK_THRESHOLD_ARRAY, risks, side="right")]
     
     def _categorize_health_score(self, score: int) -> str:
         """Categorize health score"""
-        if score >= 90:
-            return "Excellent"
-        elif score >= 80:
-            return "Very Good"
-        elif score >= 70:
-            return "Good"
-        elif score >= 60:
-            return "Fair"
-        elif score >= 50:
-            return "Poor"
-        else:
-            return "Critical"
+        return _HEALTH_SCORE_LABELS[bisect_right(_HEALTH_SCORE_THRESHOLDS, score)]
+    
+    def _get_study(self, ethnicity: str, disease: str) -> Tuple[str, str]:
+        """Get (algorithm name, study source) based on ethnicity"""
+        return _STUDY_TABLE.get((ethnicity, disease)) or _DEFAULT_STUDY[disease]
     
     def _get_algorithm(self, ethnicity: str, disease: str) -> str:
         """Get algorithm name based on ethnicity"""
-        algorithms = {
-            "african_american": {
-                "heart_disease": "Jackson Heart Study + Framingham",
-                "diabetes": "NHANES + Jackson Heart Study",
-                "cancer": "SEER Database + African American Studies"
-            },
-            "hispanic_latino": {
-                "heart_disease": "HCHS/SOL + MESA Study",
-                "diabetes": "HCHS/SOL Diabetes Study",
-                "cancer": "SEER Database + Hispanic Studies"
-            },
-            "asian_american": {
-                "heart_disease": "MESA Study + Asian Studies",
-                "diabetes": "Asian Diabetes Studies + ADA",
-                "cancer": "SEER Database + Asian Studies"
-            },
-            "native_american": {
-                "heart_disease": "Strong Heart Study",
-                "diabetes": "Strong Heart Study + Tribal Studies",
-                "cancer": "SEER Database + Tribal Studies"
-            }
-        }
-        
-        default = {
-            "heart_disease": "Framingham Risk Score",
-            "diabetes": "ADA Risk Calculator",
-            "cancer": "NCI Risk Models"
-        }
-        
-        return algorithms.get(ethnicity, {}).get(disease, default[disease])
+        return self._get_study(ethnicity, disease)[0]
     
     def _get_study_source(self, ethnicity: str, disease: str) -> str:
         """Get study source based on ethnicity"""
-        sources = {
-            "african_american": {
-                "heart_disease": "Jackson Heart Study (largest African American cardiovascular study)",
-                "diabetes": "NHANES + Jackson Heart Study diabetes data",
-                "cancer": "SEER Cancer Database (African American cohort)"
-            },
-            "hispanic_latino": {
-                "heart_disease": "Hispanic Community Health Study/Study of Latinos",
-                "diabetes": "HCHS/SOL (16,415 Hispanic/Latino participants)",
-                "cancer": "SEER Cancer Database (Hispanic/Latino cohort)"
-            },
-            "asian_american": {
-                "heart_disease": "Multi-Ethnic Study of Atherosclerosis (MESA)",
-                "diabetes": "Asian-specific diabetes research + ADA guidelines",
-                "cancer": "SEER Cancer Database (Asian American cohort)"
-            },
-            "native_american": {
-                "heart_disease": "Strong Heart Study (largest Native American cardiovascular study)",
-                "diabetes": "Strong Heart Study diabetes research",
-                "cancer": "SEER Cancer Database (Native American cohort)"
-            }
-        }
-        
-        default = {
-            "heart_disease": "Framingham Heart Study",
-            "diabetes": "American Diabetes Association guidelines",
-            "cancer": "National Cancer Institute models"
-        }
-        
-        return sources.get(ethnicity, {}).get(disease, default[disease])
+        return self._get_study(ethnicity, disease)[1]
     
     def _get_health_description(self, score: int, percentile: int, ethnicity: str) -> str:
         """Get ethnicity-aware health description"""
@@ -250,17 +309,21 @@ class EthnicityAwareMedicalRiskPredictor:
     
     def _get_ethnicity_context(self, ethnicity: str) -> str:
         """Get ethnicity-specific health context"""
-        contexts = {
-            "african_american": "Based on Jackson Heart Study and NHANES data specific to African American health patterns.",
-            "hispanic_latino": "Based on Hispanic Community Health Study/Study of Latinos (HCHS/SOL) research.",
-            "asian_american": "Based on MESA Study and Asian-specific health research with adjusted BMI thresholds.",
-            "native_american": "Based on Strong Heart Study, the largest cardiovascular study in Native American populations.",
-            "pacific_islander": "Based on Native Hawaiian and Pacific Islander health studies with population-specific adjustments.",
-            "caucasian": "Based on Framingham Heart Study and general population health data.",
-            "mixed_other": "Based on multi-ethnic health studies and conservative risk estimates."
-        }
+        return _ETHNICITY_CONTEXTS.get(ethnicity, _DEFAULT_ETHNICITY_CONTEXT)
+    
+    def get_ethnicity_metadata(self) -> Dict[str, Any]:
+        """Static study attributions and context for every known ethnicity"""
+        def entry(ethnicity: str) -> Dict[str, Any]:
+            studies = {}
+            for disease in _DISEASES:
+                algorithm, study_source = self._get_study(ethnicity, disease)
+                studies[disease] = {"algorithm": algorithm, "study_source": study_source}
+            return {"ethnicity_context": self._get_ethnicity_context(ethnicity), "studies": studies}
         
-        return contexts.get(ethnicity, "Based on general population health studies.")
+        return {
+            "ethnicities": {eth: entry(eth) for eth in _ETHNICITIES},
+            "default": entry("")
+        }
 
 
 # Initialize global predictor instance
@@ -6,379 +6,526 @@ Based on Jackson Heart Study, MESA, HCHS/SOL, Strong Heart Study, and others
 
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any
 from datetime import datetime
+from bisect import bisect_right
+from cachetools import LRUCache
+import threading
 import math
 
 
+_DISEASES = ("heart_disease", "diabetes", "cancer")
+
+# Ethnicity-specific risk multipliers from major health studies
+_ETHNICITY_RISK_MULTIPLIERS = {
+    "heart_disease": {
+        # Based on MESA Study + Jackson Heart Study + Framingham Offspring
+        "african_american": 1.77,      # Jackson Heart Study: 77% higher risk
+        "hispanic_latino": 1.43,       # HCHS/SOL: 43% higher risk
+        "asian_american": 0.75,        # MESA Study: 25% lower risk
+        "native_american": 1.65,       # Strong Heart Study: 65% higher risk
+        "pacific_islander": 1.52,      # Native Hawaiian studies: 52% higher risk
+        "caucasian": 1.0,              # Baseline reference
+        "mixed_other": 1.15            # Conservative estimate
+    },
+    "diabetes": {
+        # Based on HCHS/SOL + NHANES + Strong Heart Study + Asian studies
+        "hispanic_latino": 2.3,        # HCHS/SOL: 2.3x higher risk
+        "african_american": 1.8,       # NHANES: 1.8x higher risk
+        "native_american": 2.8,        # Strong Heart Study: 2.8x higher risk
+        "asian_american": 1.6,         # Despite lower BMI, 1.6x higher risk
+        "pacific_islander": 2.1,       # Pacific Islander studies: 2.1x higher
+        "caucasian": 1.0,              # Baseline reference
+        "mixed_other": 1.4             # Conservative estimate
+    },
+    "cancer": {
+        # Based on SEER Database + Multi-ethnic cancer studies
+        "african_american": 1.2,       # Higher overall cancer mortality
+        "hispanic_latino": 0.9,        # Lower overall cancer rates
+        "asian_american": 0.8,         # Lower overall cancer rates
+        "native_american": 1.3,        # Higher liver, kidney cancer
+        "pacific_islander": 1.1,       # Moderate increase
+        "caucasian": 1.0,              # Baseline reference
+        "mixed_other": 1.0             # Average
+    }
+}
+
+# Ethnicity-specific BMI thresholds (WHO/ADA guidelines)
+_BMI_THRESHOLDS = {
+    "asian_american": {"overweight": 23, "obese": 25},      # Lower thresholds for Asians
+    "pacific_islander": {"overweight": 26, "obese": 32},    # Higher thresholds for Pacific Islanders
+    "default": {"overweight": 25, "obese": 30}              # Standard thresholds
+}
+
+# Risk multiplier once a BMI threshold above is reached
+_BMI_RISK_MULTIPLIERS = {
+    "asian_american": {"overweight": 1.5, "obese": 2.8},    # Higher risk at lower BMI for Asians
+    "pacific_islander": {"overweight": 1.3, "obese": 2.2},  # Adjusted for higher baseline BMI
+    "default": {"overweight": 1.3, "obese": 2.5}            # Standard overweight/obese risk
+}
+
+# Population baseline data from NHANES and ethnic-specific studies
+_POPULATION_BASELINES = {
+    "heart_disease_10yr": {
+        # Jackson Heart Study + MESA + Framingham by ethnicity
+        "african_american": {
+            "male": {"20-29": 0.8, "30-39": 3.5, "40-49": 8.8, "50-59": 17.7, "60-69": 31.9, "70-79": 44.2},
+            "female": {"20-29": 0.4, "30-39": 1.8, "40-49": 4.4, "50-59": 10.6, "60-69": 21.2, "70-79": 31.9}
+        },
+        "hispanic_latino": {
+            "male": {"20-29": 0.7, "30-39": 2.9, "40-49": 7.2, "50-59": 14.3, "60-69": 25.7, "70-79": 35.8},
+            "female": {"20-29": 0.3, "30-39": 1.4, "40-49": 3.6, "50-59": 8.6, "60-69": 17.2, "70-79": 25.7}
+        },
+        "asian_american": {
+            "male": {"20-29": 0.4, "30-39": 1.5, "40-49": 3.8, "50-59": 7.5, "60-69": 13.5, "70-79": 18.8},
+            "female": {"20-29": 0.2, "30-39": 0.8, "40-49": 1.9, "50-59": 4.5, "60-69": 9.0, "70-79": 13.5}
+        },
+        "native_american": {
+            "male": {"20-29": 0.8, "30-39": 3.3, "40-49": 8.3, "50-59": 16.5, "60-69": 29.7, "70-79": 41.3},
+            "female": {"20-29": 0.4, "30-39": 1.7, "40-49": 4.1, "50-59": 9.9, "60-69": 19.8, "70-79": 29.7}
+        },
+        "caucasian": {
+            "male": {"20-29": 0.5, "30-39": 2.0, "40-49": 5.0, "50-59": 10.0, "60-69": 18.0, "70-79": 25.0},
+            "female": {"20-29": 0.2, "30-39": 1.0, "40-49": 2.5, "50-59": 6.0, "60-69": 12.0, "70-79": 18.0}
+        }
+    },
+    "diabetes_lifetime": {
+        # HCHS/SOL + Strong Heart Study + NHANES by ethnicity
+        "hispanic_latino": {"male": 50.0, "female": 52.0},      # HCHS/SOL data
+        "african_american": {"male": 47.0, "female": 53.0},     # NHANES + Jackson Heart
+        "native_american": {"male": 55.0, "female": 58.0},      # Strong Heart Study
+        "asian_american": {"male": 38.0, "female": 35.0},       # Asian studies
+        "pacific_islander": {"male": 48.0, "female": 51.0},     # Pacific Islander studies
+        "caucasian": {"male": 27.0, "female": 25.0},            # NHANES baseline
+        "mixed_other": {"male": 35.0, "female": 37.0}
+    },
+    "cancer_lifetime": {
+        # SEER Database by ethnicity
+        "african_american": {"male": 42.3, "female": 38.7},
+        "hispanic_latino": {"male": 35.2, "female": 33.1},
+        "asian_american": {"male": 31.8, "female": 29.4},
+        "native_american": {"male": 41.1, "female": 36.8},
+        "pacific_islander": {"male": 38.9, "female": 35.2},
+        "caucasian": {"male": 39.7, "female": 37.6},
+        "mixed_other": {"male": 37.5, "female": 35.0}
+    }
+}
+
+# Ethnicity-specific population health score means
+# Based on NHANES + ethnic-specific health surveys
+_POPULATION_HEALTH_MEANS = {
+    "20-39": {
+        "african_american": {"male": 68, "female": 71},
+        "hispanic_latino": {"male": 70, "female": 73},
+        "asian_american": {"male": 74, "female": 77},
+        "native_american": {"male": 65, "female": 68},
+        "pacific_islander": {"male": 67, "female": 70},
+        "caucasian": {"male": 72, "female": 75},
+        "mixed_other": {"male": 70, "female": 73}
+    },
+    "40-59": {
+        "african_american": {"male": 64, "female": 67},
+        "hispanic_latino": {"male": 66, "female": 69},
+        "asian_american": {"male": 70, "female": 73},
+        "native_american": {"male": 61, "female": 64},
+        "pacific_islander": {"male": 63, "female": 66},
+        "caucasian": {"male": 68, "female": 71},
+        "mixed_other": {"male": 66, "female": 69}
+    },
+    "60-79": {
+        "african_american": {"male": 58, "female": 62},
+        "hispanic_latino": {"male": 60, "female": 64},
+        "asian_american": {"male": 64, "female": 68},
+        "native_american": {"male": 55, "female": 59},
+        "pacific_islander": {"male": 57, "female": 61},
+        "caucasian": {"male": 62, "female": 66},
+        "mixed_other": {"male": 60, "female": 64}
+    }
+}
+
+# Spread of health scores around those means, by ethnicity
+_POPULATION_HEALTH_STD_DEVS = {
+    'african_american': 16,     # Higher health disparities
+    'hispanic_latino': 15,
+    'native_american': 17,      # Highest health disparities
+    'asian_american': 13,       # Lower health disparities
+    'pacific_islander': 15,
+    'caucasian': 15,
+    'mixed_other': 15
+}
+
+# Percentile = percentiles[number of z-score edges <= z]
+_Z_SCORE_EDGES = (-1.5, -1.0, -0.5, 0, 0.5, 1.0, 1.5, 2.0)
+_Z_SCORE_PERCENTILES = (2, 7, 16, 31, 50, 69, 84, 93, 98)
+
+# Age group = groups[number of edges <= age]
+_AGE_GROUPS = ("20-29", "30-39", "40-49", "50-59", "60-69", "70-79")
+_AGE_EDGES = (30, 40, 50, 60, 70)
+_BROAD_AGE_GROUPS = ("20-39", "40-59", "60-79")
+_BROAD_AGE_EDGES = (40, 60)
+
+# The tables above as arrays for predict_risk_batch, indexed by integer
+# codes; the extra last ethnicity row holds the fallbacks used for
+# ethnicities the tables do not list
+_ETHNICITY_CODES = {eth: i for i, eth in enumerate(_ETHNICITY_RISK_MULTIPLIERS["heart_disease"])}
+_UNKNOWN_ETHNICITY = len(_ETHNICITY_CODES)
+_GENDER_CODES = {"male": 0, "female": 1}
+
+# Lifestyle answers as small integer codes, decoded once per user
+_NEVER_SMOKED, _FORMER_SMOKER, _CURRENT_SMOKER = 0, 1, 2
+_SEDENTARY, _MODERATELY_ACTIVE, _ACTIVE = 0, 1, 2
+_NO_ALCOHOL, _MODERATE_ALCOHOL, _HEAVY_ALCOHOL = 0, 1, 2
+_ACTIVITY_CODES = {"sedentary": _SEDENTARY, "active": _ACTIVE, "very_active": _ACTIVE}
+_ALCOHOL_CODES = {"moderate": _MODERATE_ALCOHOL, "heavy": _HEAVY_ALCOHOL}
+
+
+def _smoking_code(smoking_status: str) -> int:
+    """Free-text smoking status as a code; 'current' wins over 'former'"""
+    smoking_status = smoking_status.lower()
+    if 'current' in smoking_status:
+        return _CURRENT_SMOKER
+    if 'former' in smoking_status:
+        return _FORMER_SMOKER
+    return _NEVER_SMOKED
+
+
+def _table(values) -> np.ndarray:
+    """Read-only array, since every predictor instance shares it"""
+    array = np.array(values)
+    array.setflags(write=False)
+    return array
+
+
+def _per_ethnicity(table: Dict[str, Any], default: Any) -> List[Any]:
+    return [table.get(eth, default) for eth in _ETHNICITY_CODES] + [default]
+
+
+_HEART_BASELINE = _table([
+    [[by_gender[g][age_group] for age_group in _AGE_GROUPS] for g in _GENDER_CODES]
+    for by_gender in _per_ethnicity(_POPULATION_BASELINES["heart_disease_10yr"], _POPULATION_BASELINES["heart_disease_10yr"]["caucasian"])
+])
+_DIABETES_LIFETIME = _table([
+    [by_gender[g] for g in _GENDER_CODES]
+    for by_gender in _per_ethnicity(_POPULATION_BASELINES["diabetes_lifetime"], _POPULATION_BASELINES["diabetes_lifetime"]["caucasian"])
+])
+_CANCER_LIFETIME = _table([
+    [by_gender[g] for g in _GENDER_CODES]
+    for by_gender in _per_ethnicity(_POPULATION_BASELINES["cancer_lifetime"], _POPULATION_BASELINES["cancer_lifetime"]["caucasian"])
+])
+_ETHNICITY_MULTIPLIER_ARRAYS = {
+    disease: _table(_per_ethnicity(table, 1.0))
+    for disease, table in _ETHNICITY_RISK_MULTIPLIERS.items()
+}
+# (overweight BMI, obese BMI, overweight risk, obese risk) per ethnicity code
+_BMI_BANDS = tuple(
+    (thresholds["overweight"], thresholds["obese"], multipliers["overweight"], multipliers["obese"])
+    for thresholds, multipliers in zip(
+        _per_ethnicity(_BMI_THRESHOLDS, _BMI_THRESHOLDS["default"]),
+        _per_ethnicity(_BMI_RISK_MULTIPLIERS, _BMI_RISK_MULTIPLIERS["default"])
+    )
+)
+_BMI_OVERWEIGHT, _BMI_OBESE, _BMI_OVERWEIGHT_RISK, _BMI_OBESE_RISK = (_table(column) for column in zip(*_BMI_BANDS))
+
+
+def _bmi_risk(bmi: float, eth: int) -> float:
+    """get_ethnicity_adjusted_bmi_risk for an ethnicity code"""
+    overweight, obese, overweight_risk, obese_risk = _BMI_BANDS[eth]
+    if bmi >= obese:
+        return obese_risk
+    elif bmi >= overweight:
+        return overweight_risk
+    else:
+        return 1.0  # Normal weight
+
+
+# (broad age group, ethnicity, gender); unlisted genders get the default mean of 70
+_HEALTH_MEANS = _table([
+    [[by_gender.get(g, 70) for g in list(_GENDER_CODES) + [None]]
+     for by_gender in _per_ethnicity(_POPULATION_HEALTH_MEANS[age_group], _POPULATION_HEALTH_MEANS[age_group]["caucasian"])]
+    for age_group in _BROAD_AGE_GROUPS
+])
+_HEALTH_STD_DEVS = _table(_per_ethnicity(_POPULATION_HEALTH_STD_DEVS, 15))
+
+# Lifestyle multipliers indexed by (ethnicity code, answer code); the scalar
+# scorers index these tuples and predict_risk_batch gathers from array copies
+_HEART_SMOKING_MULTIPLIERS = tuple(_per_ethnicity({        # never, former, current
+    "african_american": (1.0, 1.3, 2.3),    # Jackson Heart Study: higher smoking impact
+    "native_american": (1.0, 1.3, 2.5),     # Strong Heart Study: highest smoking impact
+}, (1.0, 1.3, 2.0)))
+_HEART_ACTIVITY_MULTIPLIERS = tuple(_per_ethnicity({       # sedentary, moderate, active
+    "african_american": (1.5, 1.0, 0.7),    # Higher sedentary risk
+    "hispanic_latino": (1.5, 1.0, 0.7),
+    "native_american": (1.4, 1.0, 0.6),     # Greater protective effect
+}, (1.4, 1.0, 0.7)))
+_HEART_FAMILY_MULTIPLIERS = tuple(_per_ethnicity({         # no family history, family history
+    "african_american": (1.0, 1.7),         # Higher genetic component
+    "hispanic_latino": (1.0, 1.6),
+    "native_american": (1.0, 1.6),
+}, (1.0, 1.5)))
+
+_DIABETES_AGE_BASES = tuple(_per_ethnicity({               # per decade past 45
+    "hispanic_latino": 1.7,                 # Faster progression
+    "native_american": 1.7,
+}, 1.5))
+_DIABETES_BMI_MULTIPLIERS = tuple(_per_ethnicity({
+    "asian_american": 1.3,                  # Additional diabetes risk for Asians
+}, 1.0))
+_DIABETES_FAMILY_MULTIPLIERS = tuple(_per_ethnicity({      # no family history, family history
+    "native_american": (1.0, 5.0),          # Strong Heart Study: highest genetic risk
+    "hispanic_latino": (1.0, 4.5),          # High genetic component
+    "african_american": (1.0, 4.5),
+}, (1.0, 4.0)))
+_DIABETES_ACTIVITY_MULTIPLIERS = tuple(_per_ethnicity({    # sedentary, moderate, active
+    "hispanic_latino": (2.0, 1.0, 0.42),    # Higher sedentary risk
+    "native_american": (2.0, 1.0, 0.42),
+}, (1.8, 1.0, 0.42)))
+_DIABETES_TEN_YEAR = tuple(_per_ethnicity({                # share of lifetime risk, cap
+    "hispanic_latino": (0.18, 65.0),        # Earlier onset
+    "native_american": (0.18, 65.0),
+}, (0.15, 60.0)))
+
+
+def _diabetes_age_multiplier(base: float, age: float) -> float:
+    return base ** ((age - 45) / 10) if age >= 45 else 1.0
+
+
+# _diabetes_age_multiplier for every (ethnicity code, whole age) up to _MAX_TABLE_AGE
+_MAX_TABLE_AGE = 120
+_DIABETES_AGE_MULTIPLIERS = tuple(
+    tuple(_diabetes_age_multiplier(base, age) for age in range(_MAX_TABLE_AGE + 1))
+    for base in _DIABETES_AGE_BASES
+)
+
+_CANCER_AGE_MULTIPLIERS = tuple(_per_ethnicity({           # under 50, 50 and over
+    "african_american": (1.0, 2.0),         # Earlier onset, more aggressive
+}, (1.0, 1.8)))
+_CANCER_SMOKING_MULTIPLIERS = tuple(_per_ethnicity({       # never, former, current
+    "african_american": (1.0, 1.3, 3.0),    # Higher lung cancer risk
+    "native_american": (1.0, 1.3, 2.8),     # High smoking-related cancer rates
+}, (1.0, 1.3, 2.5)))
+_CANCER_FAMILY_MULTIPLIERS = tuple(_per_ethnicity({        # no family history, family history
+    "african_american": (1.0, 2.0),         # Higher genetic component
+}, (1.0, 1.8)))
+_CANCER_ALCOHOL_MULTIPLIERS = tuple(_per_ethnicity({       # none, moderate, heavy
+    "asian_american": (1.0, 1.1, 1.6),      # Higher alcohol sensitivity
+    "native_american": (1.0, 1.1, 1.6),
+}, (1.0, 1.1, 1.4)))
+_CANCER_ACTIVITY_MULTIPLIERS = (1.2, 1.0, 0.8)             # sedentary, moderate, active (protective effect)
+
+
+def _column(df: pd.DataFrame, name: str, default: Any) -> pd.Series:
+    """A user_data field as a batch column, with the same default for missing values"""
+    if name not in df:
+        return pd.Series(default, index=df.index)
+    column = df[name]
+    if isinstance(column.dtype, pd.CategoricalDtype) and default not in column.cat.categories:
+        column = column.cat.add_categories([default])
+    return column.fillna(default)
+
+
+def _codes(values: np.ndarray, codes: Dict[str, int], default: Optional[int] = None) -> np.ndarray:
+    """Map each value to its integer code; unlisted values get `default` (KeyError if None)"""
+    value_codes, uniques = pd.factorize(values)
+    if default is None:
+        table = [codes[value] for value in uniques]
+    else:
+        table = [codes.get(value, default) for value in uniques]
+    return np.array(table, dtype=np.intp)[value_codes]
+
+
+def _encoded(values: np.ndarray, encode) -> np.ndarray:
+    """Run `encode` once per distinct value and gather the integer codes per row"""
+    value_codes, uniques = pd.factorize(values)
+    return np.array([encode(value) for value in uniques], dtype=np.intp)[value_codes]
+
+
+def _string_codes(column: pd.Series, codes: Dict[str, int], default: Optional[int] = None) -> np.ndarray:
+    """
+    _codes for a case-insensitive string column
+    
+    Categorical columns are decoded once per category and gathered through
+    their integer codes, so rows are never hashed or lowercased.
+    """
+    if not isinstance(column.dtype, pd.CategoricalDtype):
+        return _codes(column.str.lower().to_numpy(), codes, default)
+    categories = column.cat.categories.str.lower().to_numpy()
+    category_codes = column.cat.codes.to_numpy()
+    result = _codes(categories, codes, -1 if default is None else default)[category_codes]
+    if default is None and (result < 0).any():
+        # Only categories that rows actually use are required to be known
+        raise KeyError(categories[category_codes[result < 0][0]])
+    return result
+
+
+# Category = labels[number of thresholds <= value]
+_RISK_THRESHOLDS = (0.10, 0.20)
+_RISK_LABELS = ("Low", "Medium", "High")
+_HEALTH_SCORE_THRESHOLDS = (50, 60, 70, 80, 90)
+_HEALTH_SCORE_LABELS = ("Critical", "Poor", "Fair", "Good", "Very Good", "Excellent")
+
+_ETHNICITY_CONTEXTS = {
+    "african_american": "Based on Jackson Heart Study and NHANES data specific to African American health patterns.",
+    "hispanic_latino": "Based on Hispanic Community Health Study/Study of Latinos (HCHS/SOL) research.",
+    "asian_american": "Based on MESA Study and Asian-specific health research with adjusted BMI thresholds.",
+    "native_american": "Based on Strong Heart Study, the largest cardiovascular study in Native American populations.",
+    "pacific_islander": "Based on Native Hawaiian and Pacific Islander health studies with population-specific adjustments.",
+    "caucasian": "Based on Framingham Heart Study and general population health data.",
+    "mixed_other": "Based on multi-ethnic health studies and conservative risk estimates."
+}
+_DEFAULT_ETHNICITY_CONTEXT = "Based on general population health studies."
+
 class EthnicityAwareMedicalRiskPredictor:
     """
     Medical-grade risk prediction using validated clinical algorithms
     with ethnicity-specific adjustments from major health studies
     """
     
+    # The tables are module-level constants built once at import; instances
+    # only share references to them
+    diseases = list(_DISEASES)
+    ethnicity_risk_multipliers = _ETHNICITY_RISK_MULTIPLIERS
+    bmi_thresholds = _BMI_THRESHOLDS
+    bmi_risk_multipliers = _BMI_RISK_MULTIPLIERS
+    population_baselines = _POPULATION_BASELINES
+    population_health_means = _POPULATION_HEALTH_MEANS
+    population_health_std_devs = _POPULATION_HEALTH_STD_DEVS
+    
+    _ethnicity_codes = _ETHNICITY_CODES
+    _unknown_ethnicity = _UNKNOWN_ETHNICITY
+    _gender_codes = _GENDER_CODES
+    _z_score_edges = _Z_SCORE_EDGES
+    _z_score_percentiles = _Z_SCORE_PERCENTILES
+    _age_groups = _AGE_GROUPS
+    _age_edges = _AGE_EDGES
+    _broad_age_groups = _BROAD_AGE_GROUPS
+    _broad_age_edges = _BROAD_AGE_EDGES
+    _heart_baseline = _HEART_BASELINE
+    _diabetes_lifetime = _DIABETES_LIFETIME
+    _cancer_lifetime = _CANCER_LIFETIME
+    _ethnicity_multiplier_arrays = _ETHNICITY_MULTIPLIER_ARRAYS
+    _bmi_overweight = _BMI_OVERWEIGHT
+    _bmi_obese = _BMI_OBESE
+    _bmi_overweight_risk = _BMI_OVERWEIGHT_RISK
+    _bmi_obese_risk = _BMI_OBESE_RISK
+    _health_means = _HEALTH_MEANS
+    _health_std_devs = _HEALTH_STD_DEVS
+    # Lifestyle multiplier tables as arrays for predict_risk_batch
+    _heart_smoking_multipliers = _table(_HEART_SMOKING_MULTIPLIERS)
+    _heart_activity_multipliers = _table(_HEART_ACTIVITY_MULTIPLIERS)
+    _heart_family_multipliers = _table(_HEART_FAMILY_MULTIPLIERS)
+    _diabetes_age_multipliers = _table(_DIABETES_AGE_MULTIPLIERS)
+    _diabetes_bmi_multipliers = _table(_DIABETES_BMI_MULTIPLIERS)
+    _diabetes_family_multipliers = _table(_DIABETES_FAMILY_MULTIPLIERS)
+    _diabetes_activity_multipliers = _table(_DIABETES_ACTIVITY_MULTIPLIERS)
+    _diabetes_ten_year = _table(_DIABETES_TEN_YEAR)
+    _cancer_age_multipliers = _table(_CANCER_AGE_MULTIPLIERS)
+    _cancer_smoking_multipliers = _table(_CANCER_SMOKING_MULTIPLIERS)
+    _cancer_family_multipliers = _table(_CANCER_FAMILY_MULTIPLIERS)
+    _cancer_alcohol_multipliers = _table(_CANCER_ALCOHOL_MULTIPLIERS)
+    _cancer_activity_multipliers = _table(_CANCER_ACTIVITY_MULTIPLIERS)
+    
     def __init__(self):
-        self.diseases = ["heart_disease", "diabetes", "cancer"]
-        
-        # Ethnicity-specific risk multipliers from major health studies
-        self.ethnicity_risk_multipliers = {
-            "heart_disease": {
-                # Based on MESA Study + Jackson Heart Study + Framingham Offspring
-                "african_american": 1.77,      # Jackson Heart Study: 77% higher risk
-                "hispanic_latino": 1.43,       # HCHS/SOL: 43% higher risk
-                "asian_american": 0.75,        # MESA Study: 25% lower risk
-                "native_american": 1.65,       # Strong Heart Study: 65% higher risk
-                "pacific_islander": 1.52,      # Native Hawaiian studies: 52% higher risk
-                "caucasian": 1.0,              # Baseline reference
-                "mixed_other": 1.15            # Conservative estimate
-            },
-            "diabetes": {
-                # Based on HCHS/SOL + NHANES + Strong Heart Study + Asian studies
-                "hispanic_latino": 2.3,        # HCHS/SOL: 2.3x higher risk
-                "african_american": 1.8,       # NHANES: 1.8x higher risk
-                "native_american": 2.8,        # Strong Heart Study: 2.8x higher risk
-                "asian_american": 1.6,         # Despite lower BMI, 1.6x higher risk
-                "pacific_islander": 2.1,       # Pacific Islander studies: 2.1x higher
-                "caucasian": 1.0,              # Baseline reference
-                "mixed_other": 1.4             # Conservative estimate
-            },
-            "cancer": {
-                # Based on SEER Database + Multi-ethnic cancer studies
-                "african_american": 1.2,       # Higher overall cancer mortality
-                "hispanic_latino": 0.9,        # Lower overall cancer rates
-                "asian_american": 0.8,         # Lower overall cancer rates
-                "native_american": 1.3,        # Higher liver, kidney cancer
-                "pacific_islander": 1.1,       # Moderate increase
-                "caucasian": 1.0,              # Baseline reference
-                "mixed_other": 1.0             # Average
-            }
-        }
-        
-        # Ethnicity-specific BMI thresholds (WHO/ADA guidelines)
-        self.bmi_thresholds = {
-            "asian_american": {"overweight": 23, "obese": 25},      # Lower thresholds for Asians
-            "pacific_islander": {"overweight": 26, "obese": 32},    # Higher thresholds for Pacific Islanders
-            "default": {"overweight": 25, "obese": 30}              # Standard thresholds
-        }
-        
-        # Population baseline data from NHANES and ethnic-specific studies
-        self.population_baselines = {
-            "heart_disease_10yr": {
-                # Jackson Heart Study + MESA + Framingham by ethnicity
-                "african_american": {
-                    "male": {"20-29": 0.8, "30-39": 3.5, "40-49": 8.8, "50-59": 17.7, "60-69": 31.9, "70-79": 44.2},
-                    "female": {"20-29": 0.4, "30-39": 1.8, "40-49": 4.4, "50-59": 10.6, "60-69": 21.2, "70-79": 31.9}
-                },
-                "hispanic_latino": {
-                    "male": {"20-29": 0.7, "30-39": 2.9, "40-49": 7.2, "50-59": 14.3, "60-69": 25.7, "70-79": 35.8},
-                    "female": {"20-29": 0.3, "30-39": 1.4, "40-49": 3.6, "50-59": 8.6, "60-69": 17.2, "70-79": 25.7}
-                },
-                "asian_american": {
-                    "male": {"20-29": 0.4, "30-39": 1.5, "40-49": 3.8, "50-59": 7.5, "60-69": 13.5, "70-79": 18.8},
-                    "female": {"20-29": 0.2, "30-39": 0.8, "40-49": 1.9, "50-59": 4.5, "60-69": 9.0, "70-79": 13.5}
-                },
-                "native_american": {
-                    "male": {"20-29": 0.8, "30-39": 3.3, "40-49": 8.3, "50-59": 16.5, "60-69": 29.7, "70-79": 41.3},
-                    "female": {"20-29": 0.4, "30-39": 1.7, "40-49": 4.1, "50-59": 9.9, "60-69": 19.8, "70-79": 29.7}
-                },
-                "caucasian": {
-                    "male": {"20-29": 0.5, "30-39": 2.0, "40-49": 5.0, "50-59": 10.0, "60-69": 18.0, "70-79": 25.0},
-                    "female": {"20-29": 0.2, "30-39": 1.0, "40-49": 2.5, "50-59": 6.0, "60-69": 12.0, "70-79": 18.0}
-                }
-            },
-            "diabetes_lifetime": {
-                # HCHS/SOL + Strong Heart Study + NHANES by ethnicity
-                "hispanic_latino": {"male": 50.0, "female": 52.0},      # HCHS/SOL data
-                "african_american": {"male": 47.0, "female": 53.0},     # NHANES + Jackson Heart
-                "native_american": {"male": 55.0, "female": 58.0},      # Strong Heart Study
-                "asian_american": {"male": 38.0, "female": 35.0},       # Asian studies
-                "pacific_islander": {"male": 48.0, "female": 51.0},     # Pacific Islander studies
-                "caucasian": {"male": 27.0, "female": 25.0},            # NHANES baseline
-                "mixed_other": {"male": 35.0, "female": 37.0}
-            },
-            "cancer_lifetime": {
-                # SEER Database by ethnicity
-                "african_american": {"male": 42.3, "female": 38.7},
-                "hispanic_latino": {"male": 35.2, "female": 33.1},
-                "asian_american": {"male": 31.8, "female": 29.4},
-                "native_american": {"male": 41.1, "female": 36.8},
-                "pacific_islander": {"male": 38.9, "female": 35.2},
-                "caucasian": {"male": 39.7, "female": 37.6},
-                "mixed_other": {"male": 37.5, "female": 35.0}
-            }
-        }
-        
-        # Ethnicity-specific population health score means
-        # Based on NHANES + ethnic-specific health surveys
-        self.population_health_means = {
-            "20-39": {
-                "african_american": {"male": 68, "female": 71},
-                "hispanic_latino": {"male": 70, "female": 73},
-                "asian_american": {"male": 74, "female": 77},
-                "native_american": {"male": 65, "female": 68},
-                "pacific_islander": {"male": 67, "female": 70},
-                "caucasian": {"male": 72, "female": 75},
-                "mixed_other": {"male": 70, "female": 73}
-            },
-            "40-59": {
-                "african_american": {"male": 64, "female": 67},
-                "hispanic_latino": {"male": 66, "female": 69},
-                "asian_american": {"male": 70, "female": 73},
-                "native_american": {"male": 61, "female": 64},
-                "pacific_islander": {"male": 63, "female": 66},
-                "caucasian": {"male": 68, "female": 71},
-                "mixed_other": {"male": 66, "female": 69}
-            },
-            "60-79": {
-                "african_american": {"male": 58, "female": 62},
-                "hispanic_latino": {"male": 60, "female": 64},
-                "asian_american": {"male": 64, "female": 68},
-                "native_american": {"male": 55, "female": 59},
-                "pacific_islander": {"male": 57, "female": 61},
-                "caucasian": {"male": 62, "female": 66},
-                "mixed_other": {"male": 60, "female": 64}
-            }
-        }
+        # predict_risk results keyed by the inputs it actually reads
+        self._result_cache: LRUCache = LRUCache(maxsize=4096)
+        self._result_cache_lock = threading.Lock()
     
     def get_ethnicity_adjusted_bmi_risk(self, bmi: float, ethnicity: str) -> float:
         """
         Calculate BMI risk with ethnicity-specific thresholds
         Based on WHO guidelines for Asian populations and Pacific Islander studies
         """
-        thresholds = self.bmi_thresholds.get(ethnicity, self.bmi_thresholds["default"])
-        
-        if bmi >= thresholds["obese"]:
-            if ethnicity == "asian_american":
-                return 2.8  # Higher risk at lower BMI for Asians
-            elif ethnicity == "pacific_islander":
-                return 2.2  # Adjusted for higher baseline BMI
-            else:
-                return 2.5  # Standard obese risk
-        elif bmi >= thresholds["overweight"]:
-            if ethnicity == "asian_american":
-                return 1.5  # Increased risk at lower BMI
-            else:
-                return 1.3  # Standard overweight risk
-        else:
-            return 1.0  # Normal weight
+        return _bmi_risk(bmi, _ETHNICITY_CODES.get(ethnicity, _UNKNOWN_ETHNICITY))
     
     def calculate_framingham_risk(self, user_data: Dict[str, Any]) -> float:
         """
         Calculate 10-year cardiovascular risk using ethnicity-adjusted Framingham Risk Score
         Based on Framingham + Jackson Heart Study + MESA + HCHS/SOL
         """
-        age = int(user_data.get('age', 35))
-        gender = user_data.get('gender', 'male').lower()
-        ethnicity = user_data.get('ethnicity', 'caucasian').lower()
-        
-        # Get ethnicity-specific baseline risk
-        age_group = self._get_age_group(age)
-        baseline_data = self.population_baselines["heart_disease_10yr"].get(ethnicity, 
-                       self.population_baselines["heart_disease_10yr"]["caucasian"])
-        baseline_risk = baseline_data[gender].get(age_group, 5.0)
-        
-        # Risk multipliers from clinical literature
-        risk_multipliers = 1.0
-        
-        # Smoking (ethnicity-specific effects from studies)
-        smoking_status = user_data.get('smokingStatus', 'never')
-        if 'current' in smoking_status.lower():
-            if ethnicity == 'african_american':
-                risk_multipliers *= 2.3  # Jackson Heart Study: higher smoking impact
-            elif ethnicity == 'native_american':
-                risk_multipliers *= 2.5  # Strong Heart Study: highest smoking impact
-            else:
-                risk_multipliers *= 2.0  # Standard smoking risk
-        elif 'former' in smoking_status.lower():
-            risk_multipliers *= 1.3
-        
-        # BMI with ethnicity-specific thresholds
-        height_cm = float(user_data.get('height', 170))
-        weight_kg = float(user_data.get('weight', 70))
-        bmi = weight_kg / ((height_cm / 100) ** 2)
-        bmi_risk = self.get_ethnicity_adjusted_bmi_risk(bmi, ethnicity)
-        risk_multipliers *= bmi_risk
-        
-        # Physical activity (ethnicity-specific benefits)
-        activity_level = user_data.get('activityLevel', 'moderate')
-        if activity_level == 'sedentary':
-            if ethnicity in ['african_american', 'hispanic_latino']:
-                risk_multipliers *= 1.5  # Higher sedentary risk in these populations
-            else:
-                risk_multipliers *= 1.4
-        elif activity_level in ['active', 'very_active']:
-            if ethnicity == 'native_american':
-                risk_multipliers *= 0.6  # Greater protective effect
-            else:
-                risk_multipliers *= 0.7
-        
-        # Family history with ethnicity-specific genetic factors
-        family_heart_disease = user_data.get('familyHeartDisease', False)
-        if family_heart_disease:
-            if ethnicity == 'african_american':
-                risk_multipliers *= 1.7  # Higher genetic component
-            elif ethnicity in ['hispanic_latino', 'native_american']:
-                risk_multipliers *= 1.6
-            else:
-                risk_multipliers *= 1.5
-        
-        # Apply ethnicity-specific multiplier
-        ethnicity_multiplier = self.ethnicity_risk_multipliers["heart_disease"].get(ethnicity, 1.0)
-        risk_multipliers *= ethnicity_multiplier
-        
-        # Calculate final 10-year risk percentage
-        ten_year_risk = min(baseline_risk * risk_multipliers, 85.0)  # Cap at 85%
-        
-        return ten_year_risk / 100.0  # Return as decimal
+        return self._score_all(user_data)[0]
     
     def calculate_diabetes_risk(self, user_data: Dict[str, Any]) -> float:
         """
         Calculate diabetes risk using ethnicity-adjusted ADA validated risk factors
         Based on ADA + HCHS/SOL + Strong Heart Study + Asian diabetes studies
         """
-        age = int(user_data.get('age', 35))
-        gender = user_data.get('gender', 'male').lower()
-        ethnicity = user_data.get('ethnicity', 'caucasian').lower()
-        
-        # Start with ethnicity-specific baseline lifetime risk
-        baseline_data = self.population_baselines["diabetes_lifetime"].get(ethnicity,
-                       self.population_baselines["diabetes_lifetime"]["caucasian"])
-        baseline_risk = baseline_data[gender]
-        
-        # Age factor (ethnicity-specific progression)
-        age_multiplier = 1.0
-        if age >= 45:
-            if ethnicity in ['hispanic_latino', 'native_american']:
-                age_multiplier = 1.7 ** ((age - 45) / 10)  # Faster progression
-            else:
-                age_multiplier = 1.5 ** ((age - 45) / 10)
-        
-        # BMI with ethnicity-specific thresholds
-        height_cm = float(user_data.get('height', 170))
-        weight_kg = float(user_data.get('weight', 70))
-        bmi = weight_kg / ((height_cm / 100) ** 2)
-        
-        bmi_multiplier = self.get_ethnicity_adjusted_bmi_risk(bmi, ethnicity)
-        if ethnicity == 'asian_american':
-            bmi_multiplier *= 1.3  # Additional diabetes risk for Asians
-        
-        # Family history (ethnicity-specific genetic predisposition)
-        family_diabetes = user_data.get('familyDiabetes', False)
-        if family_diabetes:
-            if ethnicity == 'native_american':
-                family_multiplier = 5.0  # Strong Heart Study: highest genetic risk
-            elif ethnicity in ['hispanic_latino', 'african_american']:
-                family_multiplier = 4.5  # High genetic component
-            else:
-                family_multiplier = 4.0
-        else:
-            family_multiplier = 1.0
-        
-        # Physical activity (ethnicity-specific benefits)
-        activity_level = user_data.get('activityLevel', 'moderate')
-        if activity_level == 'sedentary':
-            if ethnicity in ['hispanic_latino', 'native_american']:
-                activity_multiplier = 2.0  # Higher sedentary risk
-            else:
-                activity_multiplier = 1.8
-        elif activity_level in ['active', 'very_active']:
-            activity_multiplier = 0.42
-        else:
-            activity_multiplier = 1.0
-        
-        # Apply ethnicity-specific multiplier
-        ethnicity_multiplier = self.ethnicity_risk_multipliers["diabetes"].get(ethnicity, 1.0)
-        
-        # Calculate lifetime risk percentage
-        lifetime_risk = baseline_risk * age_multiplier * bmi_multiplier * family_multiplier * activity_multiplier * ethnicity_multiplier
-        
-        # Convert to 10-year risk (ethnicity-adjusted)
-        if ethnicity in ['hispanic_latino', 'native_american']:
-            ten_year_risk = min(lifetime_risk * 0.18, 65.0)  # Earlier onset
-        else:
-            ten_year_risk = min(lifetime_risk * 0.15, 60.0)
-        
-        return ten_year_risk / 100.0  # Return as decimal
+        return self._score_all(user_data)[1]
     
     def calculate_cancer_risk(self, user_data: Dict[str, Any]) -> float:
         """
         Calculate cancer risk using ethnicity-adjusted NCI validated models
         Based on SEER Database + ethnic-specific cancer studies
         """
+        return self._score_all(user_data)[2]
+    
+    def _score_all(self, user_data: Dict[str, Any]) -> Tuple[float, float, float]:
+        """
+        Heart disease, diabetes and cancer risk (as decimals) in one pass
+        
+        Every user_data field is read and decoded once and shared by the three
+        models; predict_risk_batch is the vectorized counterpart.
+        """
         age = int(user_data.get('age', 35))
         gender = user_data.get('gender', 'male').lower()
         ethnicity = user_data.get('ethnicity', 'caucasian').lower()
+        eth = _ETHNICITY_CODES.get(ethnicity, _UNKNOWN_ETHNICITY)
+        smoking = _smoking_code(user_data.get('smokingStatus', 'never'))
+        activity = _ACTIVITY_CODES.get(user_data.get('activityLevel', 'moderate'), _MODERATELY_ACTIVE)
+        alcohol = _ALCOHOL_CODES.get(user_data.get('alcoholConsumption', 'never'), _NO_ALCOHOL)
+        family_heart_disease = int(bool(user_data.get('familyHeartDisease', False)))
+        family_diabetes = int(bool(user_data.get('familyDiabetes', False)))
+        family_cancer = int(bool(user_data.get('familyCancer', False)))
         
-        # Ethnicity-specific baseline lifetime risk from SEER
-        baseline_data = self.population_baselines["cancer_lifetime"].get(ethnicity,
-                       self.population_baselines["cancer_lifetime"]["caucasian"])
-        baseline_risk = baseline_data[gender]
-        
-        # Age factor (ethnicity-specific patterns)
-        age_multiplier = 1.0
-        if age >= 50:
-            if ethnicity == 'african_american':
-                age_multiplier = 2.0  # Earlier onset, more aggressive
-            else:
-                age_multiplier = 1.8
-        elif age >= 65:
-            age_multiplier = 3.2
-        
-        # Smoking (ethnicity-specific cancer risks)
-        smoking_status = user_data.get('smokingStatus', 'never')
-        if 'current' in smoking_status.lower():
-            if ethnicity == 'african_american':
-                smoking_multiplier = 3.0  # Higher lung cancer risk
-            elif ethnicity == 'native_american':
-                smoking_multiplier = 2.8  # High smoking-related cancer rates
-            else:
-                smoking_multiplier = 2.5
-        elif 'former' in smoking_status.lower():
-            smoking_multiplier = 1.3
-        else:
-            smoking_multiplier = 1.0
-        
-        # Family history (ethnicity-specific genetic factors)
-        family_cancer = user_data.get('familyCancer', False)
-        if family_cancer:
-            if ethnicity == 'african_american':
-                family_multiplier = 2.0  # Higher genetic component
-            else:
-                family_multiplier = 1.8
-        else:
-            family_multiplier = 1.0
-        
-        # Alcohol consumption (ethnicity-specific metabolism)
-        alcohol_consumption = user_data.get('alcoholConsumption', 'never')
-        if alcohol_consumption == 'heavy':
-            if ethnicity in ['asian_american', 'native_american']:
-                alcohol_multiplier = 1.6  # Higher alcohol sensitivity
-            else:
-                alcohol_multiplier = 1.4
-        elif alcohol_consumption == 'moderate':
-            alcohol_multiplier = 1.1
-        else:
-            alcohol_multiplier = 1.0
+        # BMI with ethnicity-specific thresholds
+        height_cm = float(user_data.get('height', 170))
+        weight_kg = float(user_data.get('weight', 70))
+        bmi = weight_kg / ((height_cm / 100) ** 2)
+        bmi_risk = _bmi_risk(bmi, eth)
+        
+        # Heart disease: ethnicity-specific 10-year baseline (Jackson Heart Study + MESA + Framingham)
+        heart_baseline = self.population_baselines["heart_disease_10yr"].get(ethnicity,
+                         self.population_baselines["heart_disease_10yr"]["caucasian"])
+        heart_multipliers = (
+            _HEART_SMOKING_MULTIPLIERS[eth][smoking]
+            * bmi_risk
+            * _HEART_ACTIVITY_MULTIPLIERS[eth][activity]
+            * _HEART_FAMILY_MULTIPLIERS[eth][family_heart_disease]
+            * self.ethnicity_risk_multipliers["heart_disease"].get(ethnicity, 1.0)
+        )
+        heart_risk = min(heart_baseline[gender].get(self._get_age_group(age), 5.0) * heart_multipliers, 85.0)  # Cap at 85%
         
-        # Physical activity (protective effect)
-        activity_level = user_data.get('activityLevel', 'moderate')
-        if activity_level == 'sedentary':
-            activity_multiplier = 1.2
-        elif activity_level in ['active', 'very_active']:
-            activity_multiplier = 0.8
+        # Diabetes: ethnicity-specific lifetime baseline (HCHS/SOL + Strong Heart Study + NHANES)
+        diabetes_baseline = self.population_baselines["diabetes_lifetime"].get(ethnicity,
+                            self.population_baselines["diabetes_lifetime"]["caucasian"])
+        if 0 <= age <= _MAX_TABLE_AGE:
+            diabetes_age = _DIABETES_AGE_MULTIPLIERS[eth][age]
         else:
-            activity_multiplier = 1.0
-        
-        # Apply ethnicity-specific multiplier
-        ethnicity_multiplier = self.ethnicity_risk_multipliers["cancer"].get(ethnicity, 1.0)
-        
-        # Calculate lifetime risk
-        lifetime_risk = baseline_risk * age_multiplier * smoking_multiplier * family_multiplier * alcohol_multiplier * activity_multiplier * ethnicity_multiplier
-        
-        # Convert to 10-year risk
-        ten_year_risk = min(lifetime_risk * 0.12, 55.0)  # Cap at 55%
+            diabetes_age = _diabetes_age_multiplier(_DIABETES_AGE_BASES[eth], age)
+        diabetes_lifetime = (
+            diabetes_baseline[gender]
+            * diabetes_age
+            * (bmi_risk * _DIABETES_BMI_MULTIPLIERS[eth])
+            * _DIABETES_FAMILY_MULTIPLIERS[eth][family_diabetes]
+            * _DIABETES_ACTIVITY_MULTIPLIERS[eth][activity]
+            * self.ethnicity_risk_multipliers["diabetes"].get(ethnicity, 1.0)
+        )
+        ten_year_share, ten_year_cap = _DIABETES_TEN_YEAR[eth]
+        diabetes_risk = min(diabetes_lifetime * ten_year_share, ten_year_cap)
+        
+        # Cancer: ethnicity-specific lifetime baseline (SEER)
+        cancer_baseline = self.population_baselines["cancer_lifetime"].get(ethnicity,
+                          self.population_baselines["cancer_lifetime"]["caucasian"])
+        cancer_lifetime = (
+            cancer_baseline[gender]
+            * _CANCER_AGE_MULTIPLIERS[eth][int(age >= 50)]
+            * _CANCER_SMOKING_MULTIPLIERS[eth][smoking]
+            * _CANCER_FAMILY_MULTIPLIERS[eth][family_cancer]
+            * _CANCER_ALCOHOL_MULTIPLIERS[eth][alcohol]
+            * _CANCER_ACTIVITY_MULTIPLIERS[activity]
+            * self.ethnicity_risk_multipliers["cancer"].get(ethnicity, 1.0)
+        )
+        cancer_risk = min(cancer_lifetime * 0.12, 55.0)  # Cap at 55%
         
-        return ten_year_risk / 100.0  # Return as decimal
+        return heart_risk / 100.0, diabetes_risk / 100.0, cancer_risk / 100.0
     
     def calculate_health_vitality_index(self, predictions: Dict[str, Any], user_data: Dict[str, Any]) -> int:
         """
@@ -445,6 +592,45 @@ class EthnicityAwareMedicalRiskPredictor:
         
         return round(final_score)
     
+    def calculate_health_vitality_index_batch(self, risks: np.ndarray, df: pd.DataFrame) -> np.ndarray:
+        """
+        Vectorized calculate_health_vitality_index for many users
+        
+        `risks` is the (N, 3) output of predict_risk_batch for the same `df`;
+        returns the N integer scores.
+        """
+        heart_risk, diabetes_risk, cancer_risk = np.asarray(risks, dtype=float).T
+        weighted_disease_risk = heart_risk * 0.40 + cancer_risk * 0.35 + diabetes_risk * 0.25
+        base_health_score = 100 - (weighted_disease_risk * 100)
+        
+        ethnicity = _string_codes(_column(df, 'ethnicity', 'caucasian'), self._ethnicity_codes, self._unknown_ethnicity)
+        codes = self._ethnicity_codes
+        greater_exercise_benefit = np.isin(ethnicity, [codes['hispanic_latino'], codes['native_american']])
+        stress_sensitive = np.isin(ethnicity, [codes['african_american'], codes['hispanic_latino']])
+        greater_non_smoking_benefit = np.isin(ethnicity, [codes['native_american'], codes['african_american']])
+        
+        activity_level = _column(df, 'activityLevel', 'moderate').to_numpy()
+        active = np.isin(activity_level, ['active', 'very_active'])
+        sleep_hours = _column(df, 'sleepHours', 7).astype(float).to_numpy()
+        stress_level = np.trunc(_column(df, 'stressLevel', 5).astype(float).to_numpy())
+        smoking_status = _column(df, 'smokingStatus', 'never').to_numpy()
+        never_smoked = smoking_status == 'never'
+        former_smoker = _encoded(smoking_status, lambda status: 'former' in status.lower()).astype(bool)
+        
+        health_bonuses = (
+            np.select([active & greater_exercise_benefit, active, activity_level == 'moderate'], [10, 8, 3], 0)
+            + np.select(
+                [(7 <= sleep_hours) & (sleep_hours <= 9),
+                 ((6 <= sleep_hours) & (sleep_hours < 7)) | ((9 < sleep_hours) & (sleep_hours <= 10))],
+                [5, 2], 0
+            )
+            + np.select([stress_level <= 3, stress_level <= 5, (stress_level >= 8) & stress_sensitive], [5, 2, -3], 0)
+            + np.select([never_smoked & greater_non_smoking_benefit, never_smoked, former_smoker], [12, 10, 5], 0)
+        )
+        
+        # np.rint rounds half to even, like round()
+        return np.rint(np.clip(base_health_score + health_bonuses, 0, 100)).astype(int)
+    
     def get_population_percentile(self, health_score: int, age: int, gender: str, ethnicity: str) -> int:
         """
         Calculate ethnicity-specific percentile ranking
@@ -453,110 +639,83 @@ class EthnicityAwareMedicalRiskPredictor:
         age_group = self._get_age_group_broad(age)
         ethnicity_data = self.population_health_means.get(age_group, {})
         population_mean = ethnicity_data.get(ethnicity, ethnicity_data.get('caucasian', {})).get(gender, 70)
+        std_dev = self.population_health_std_devs.get(ethnicity, 15)
         
-        # Ethnicity-specific standard deviations
-        std_dev_adjustments = {
-            'african_american': 16,     # Higher health disparities
-            'hispanic_latino': 15,
-            'native_american': 17,      # Highest health disparities
-            'asian_american': 13,       # Lower health disparities
-            'pacific_islander': 15,
-            'caucasian': 15,
-            'mixed_other': 15
-        }
-        
-        std_dev = std_dev_adjustments.get(ethnicity, 15)
-        
-        # Calculate z-score and percentile
+        # Calculate z-score and convert to percentile (approximate)
         z_score = (health_score - population_mean) / std_dev
-        
-        # Convert to percentile (approximate)
-        if z_score >= 2.0:
-            percentile = 98
-        elif z_score >= 1.5:
-            percentile = 93
-        elif z_score >= 1.0:
-            percentile = 84
-        elif z_score >= 0.5:
-            percentile = 69
-        elif z_score >= 0:
-            percentile = 50
-        elif z_score >= -0.5:
-            percentile = 31
-        elif z_score >= -1.0:
-            percentile = 16
-        elif z_score >= -1.5:
-            percentile = 7
-        else:
-            percentile = 2
-        
-        return percentile
+        return self._z_score_percentiles[bisect_right(self._z_score_edges, z_score)]
+    
+    def get_population_percentile_batch(
+        self, health_scores: np.ndarray, ages: np.ndarray, genders: np.ndarray, ethnicities: np.ndarray
+    ) -> np.ndarray:
+        """get_population_percentile over arrays of scores, ages, genders and ethnicities"""
+        age_group = np.searchsorted(self._broad_age_edges, ages, side='right')
+        ethnicity = _codes(ethnicities, self._ethnicity_codes, self._unknown_ethnicity)
+        gender = _codes(genders, self._gender_codes, len(self._gender_codes))
+        z_scores = (np.asarray(health_scores) - self._health_means[age_group, ethnicity, gender]) / self._health_std_devs[ethnicity]
+        return np.asarray(self._z_score_percentiles)[np.searchsorted(self._z_score_edges, z_scores, side='right')]
     
     def _get_age_group(self, age: int) -> str:
         """Get age group for risk calculations"""
-        if age < 30:
-            return "20-29"
-        elif age < 40:
-            return "30-39"
-        elif age < 50:
-            return "40-49"
-        elif age < 60:
-            return "50-59"
-        elif age < 70:
-            return "60-69"
-        else:
-            return "70-79"
+        return self._age_groups[bisect_right(self._age_edges, age)]
     
     def _get_age_group_broad(self, age: int) -> str:
         """Get broad age group for population comparisons"""
-        if age < 40:
-            return "20-39"
-        elif age < 60:
-            return "40-59"
-        else:
-            return "60-79"
+        return self._broad_age_groups[bisect_right(self._broad_age_edges, age)]
     
     def predict_risk(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Generate ethnicity-aware evidence-based risk predictions
+        
+        Results are memoized per distinct input and shared between callers,
+        so treat the returned dict as read-only.
         """
+        key = (
+            int(user_data.get('age', 35)),
+            user_data.get('gender', 'male'),
+            user_data.get('ethnicity', 'caucasian').lower(),
+            user_data.get('smokingStatus', 'never'),
+            user_data.get('activityLevel', 'moderate'),
+            _ALCOHOL_CODES.get(user_data.get('alcoholConsumption', 'never'), _NO_ALCOHOL),
+            bool(user_data.get('familyHeartDisease', False)),
+            bool(user_data.get('familyDiabetes', False)),
+            bool(user_data.get('familyCancer', False)),
+            float(user_data.get('height', 170)),
+            float(user_data.get('weight', 70)),
+            float(user_data.get('sleepHours', 7)),
+            int(user_data.get('stressLevel', 5)),
+        )
+        with self._result_cache_lock:
+            cached = self._result_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        result = self._predict_risk(user_data)
+        with self._result_cache_lock:
+            self._result_cache[key] = result
+        return result
+    
+    def _predict_risk(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
         ethnicity = user_data.get('ethnicity', 'caucasian').lower()
         
         # Calculate individual disease risks using ethnicity-adjusted clinical algorithms
-        heart_risk = self.calculate_framingham_risk(user_data)
-        diabetes_risk = self.calculate_diabetes_risk(user_data)
-        cancer_risk = self.calculate_cancer_risk(user_data)
+        risks = self._score_all(user_data)
         
         # Get study attributions based on ethnicity
         study_attributions = self._get_study_attributions(ethnicity)
         
         # Create predictions dictionary
-        predictions = {
-            "heart_disease": {
-                "risk_score": heart_risk,
-                "risk_percentage": f"{heart_risk * 100:.1f}%",
-                "risk_category": self._categorize_risk(heart_risk),
-                "confidence": study_attributions["heart_disease"]["confidence"],
-                "algorithm": study_attributions["heart_disease"]["algorithm"],
-                "study_source": study_attributions["heart_disease"]["study"]
-            },
-            "diabetes": {
-                "risk_score": diabetes_risk,
-                "risk_percentage": f"{diabetes_risk * 100:.1f}%",
-                "risk_category": self._categorize_risk(diabetes_risk),
-                "confidence": study_attributions["diabetes"]["confidence"],
-                "algorithm": study_attributions["diabetes"]["algorithm"],
-                "study_source": study_attributions["diabetes"]["study"]
-            },
-            "cancer": {
-                "risk_score": cancer_risk,
-                "risk_percentage": f"{cancer_risk * 100:.1f}%",
-                "risk_category": self._categorize_risk(cancer_risk),
-                "confidence": study_attributions["cancer"]["confidence"],
-                "algorithm": study_attributions["cancer"]["algorithm"],
-                "study_source": study_attributions["cancer"]["study"]
+        predictions = {}
+        for disease, risk in zip(_DISEASES, risks):
+            attribution = study_attributions[disease]
+            predictions[disease] = {
+                "risk_score": risk,
+                "risk_percentage": f"{risk * 100:.1f}%",
+                "risk_category": self._categorize_risk(risk),
+                "confidence": attribution["confidence"],
+                "algorithm": attribution["algorithm"],
+                "study_source": attribution["study"]
             }
-        }
         
         # Calculate unified health score
         health_score = self.calculate_health_vitality_index(predictions, user_data)
@@ -577,6 +736,84 @@ class EthnicityAwareMedicalRiskPredictor:
         
         return predictions
     
+    def predict_risk_batch(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Vectorized heart disease, diabetes and cancer risk for many users
+        
+        `df` has one row per user with the same fields predict_risk reads from
+        user_data; missing columns or values fall back to the same defaults.
+        Returns an (N, 3) array equal, row by row, to _score_all.
+        
+        For large frames store 'ethnicity' and 'gender' as categoricals
+        (astype("category") at ingest); they are then mapped per category
+        instead of per row.
+        """
+        age_years = np.trunc(_column(df, 'age', 35).astype(float).to_numpy())
+        age_group = np.searchsorted(self._age_edges, age_years, side='right')
+        gender = _string_codes(_column(df, 'gender', 'male'), self._gender_codes)
+        ethnicity = _string_codes(_column(df, 'ethnicity', 'caucasian'), self._ethnicity_codes, self._unknown_ethnicity)
+        smoking = _encoded(_column(df, 'smokingStatus', 'never').to_numpy(), _smoking_code)
+        activity = _codes(_column(df, 'activityLevel', 'moderate').to_numpy(), _ACTIVITY_CODES, _MODERATELY_ACTIVE)
+        alcohol = _codes(_column(df, 'alcoholConsumption', 'never').to_numpy(), _ALCOHOL_CODES, _NO_ALCOHOL)
+        family_heart_disease = _column(df, 'familyHeartDisease', False).astype(bool).to_numpy(dtype=np.intp)
+        family_diabetes = _column(df, 'familyDiabetes', False).astype(bool).to_numpy(dtype=np.intp)
+        family_cancer = _column(df, 'familyCancer', False).astype(bool).to_numpy(dtype=np.intp)
+        height_cm = _column(df, 'height', 170).astype(float).to_numpy()
+        weight_kg = _column(df, 'weight', 70).astype(float).to_numpy()
+        bmi = weight_kg / ((height_cm / 100) ** 2)
+        
+        bmi_risk = self._get_ethnicity_adjusted_bmi_risk_batch(bmi, ethnicity)
+        
+        # Heart disease (calculate_framingham_risk)
+        heart_baseline = self._heart_baseline[ethnicity, gender, age_group]
+        heart_multipliers = (
+            self._heart_smoking_multipliers[ethnicity, smoking]
+            * bmi_risk
+            * self._heart_activity_multipliers[ethnicity, activity]
+            * self._heart_family_multipliers[ethnicity, family_heart_disease]
+            * self._ethnicity_multiplier_arrays["heart_disease"][ethnicity]
+        )
+        heart_risk = np.minimum(heart_baseline * heart_multipliers, 85.0) / 100.0
+        
+        # Diabetes (calculate_diabetes_risk)
+        diabetes_baseline = self._diabetes_lifetime[ethnicity, gender]
+        in_table = (age_years >= 0) & (age_years <= _MAX_TABLE_AGE)
+        diabetes_age = self._diabetes_age_multipliers[ethnicity, np.where(in_table, age_years, 0).astype(np.intp)]
+        for i in np.flatnonzero(~in_table):
+            diabetes_age[i] = _diabetes_age_multiplier(_DIABETES_AGE_BASES[ethnicity[i]], float(age_years[i]))
+        diabetes_bmi = bmi_risk * self._diabetes_bmi_multipliers[ethnicity]
+        diabetes_lifetime = (
+            diabetes_baseline * diabetes_age * diabetes_bmi
+            * self._diabetes_family_multipliers[ethnicity, family_diabetes]
+            * self._diabetes_activity_multipliers[ethnicity, activity]
+            * self._ethnicity_multiplier_arrays["diabetes"][ethnicity]
+        )
+        ten_year_share, ten_year_cap = self._diabetes_ten_year[ethnicity].T
+        diabetes_risk = np.minimum(diabetes_lifetime * ten_year_share, ten_year_cap) / 100.0
+        
+        # Cancer (calculate_cancer_risk)
+        cancer_baseline = self._cancer_lifetime[ethnicity, gender]
+        cancer_lifetime = (
+            cancer_baseline
+            * self._cancer_age_multipliers[ethnicity, (age_years >= 50).astype(np.intp)]
+            * self._cancer_smoking_multipliers[ethnicity, smoking]
+            * self._cancer_family_multipliers[ethnicity, family_cancer]
+            * self._cancer_alcohol_multipliers[ethnicity, alcohol]
+            * self._cancer_activity_multipliers[activity]
+            * self._ethnicity_multiplier_arrays["cancer"][ethnicity]
+        )
+        cancer_risk = np.minimum(cancer_lifetime * 0.12, 55.0) / 100.0
+        
+        return np.column_stack((heart_risk, diabetes_risk, cancer_risk))
+    
+    def _get_ethnicity_adjusted_bmi_risk_batch(self, bmi: np.ndarray, ethnicity: np.ndarray) -> np.ndarray:
+        """get_ethnicity_adjusted_bmi_risk over arrays of BMIs and ethnicity codes"""
+        return np.select(
+            [bmi >= self._bmi_obese[ethnicity], bmi >= self._bmi_overweight[ethnicity]],
+            [self._bmi_obese_risk[ethnicity], self._bmi_overweight_risk[ethnicity]],
+            1.0
+        )
+    
     def _get_study_attributions(self, ethnicity: str) -> Dict[str, Dict[str, Any]]:
         """Get study attributions based on ethnicity"""
         attributions = {
@@ -616,4 +853,84 @@ class EthnicityAwareMedicalRiskPredictor:
             },
             "asian_american": {
                 "heart_disease": {
-                    "algorithm": "
+                    "algorithm": "MESA Study + Asian Studies",
+                    "confidence": 0.89,
+                    "study": "Multi-Ethnic Study of Atherosclerosis (MESA)"
+                },
+                "diabetes": {
+                    "algorithm": "Asian Diabetes Studies + ADA",
+                    "confidence": 0.92,
+                    "study": "Asian-specific diabetes research + ADA guidelines"
+                },
+                "cancer": {
+                    "algorithm": "SEER Database + Asian Studies",
+                    "confidence": 0.85,
+                    "study": "SEER Cancer Database (Asian American cohort)"
+                }
+            },
+            "native_american": {
+                "heart_disease": {
+                    "algorithm": "Strong Heart Study",
+                    "confidence": 0.89,
+                    "study": "Strong Heart Study (largest Native American cardiovascular study)"
+                },
+                "diabetes": {
+                    "algorithm": "Strong Heart Study + Tribal Studies",
+                    "confidence": 0.92,
+                    "study": "Strong Heart Study diabetes research"
+                },
+                "cancer": {
+                    "algorithm": "SEER Database + Tribal Studies",
+                    "confidence": 0.85,
+                    "study": "SEER Cancer Database (Native American cohort)"
+                }
+            }
+        }
+        
+        # Other ethnicities use the general-population models
+        default_attributions = {
+            "heart_disease": {
+                "algorithm": "Framingham Risk Score",
+                "confidence": 0.89,
+                "study": "Framingham Heart Study"
+            },
+            "diabetes": {
+                "algorithm": "ADA Risk Calculator",
+                "confidence": 0.92,
+                "study": "American Diabetes Association guidelines"
+            },
+            "cancer": {
+                "algorithm": "NCI Risk Models",
+                "confidence": 0.85,
+                "study": "National Cancer Institute models"
+            }
+        }
+        
+        return attributions.get(ethnicity, default_attributions)
+    
+    def _categorize_risk(self, risk_score: float) -> str:
+        """Categorize risk level"""
+        return _RISK_LABELS[bisect_right(_RISK_THRESHOLDS, risk_score)]
+    
+    def _categorize_health_score(self, score: int) -> str:
+        """Categorize health score"""
+        return _HEALTH_SCORE_LABELS[bisect_right(_HEALTH_SCORE_THRESHOLDS, score)]
+    
+    def _get_health_description(self, score: int, percentile: int, ethnicity: str) -> str:
+        """Get ethnicity-aware health description"""
+        ethnicity_display = ethnicity.replace('_', ' ').title()
+        
+        if score >= 90:
+            return f"Outstanding health! You're in the top {100-percentile}% of {ethnicity_display} individuals your age."
+        elif score >= 80:
+            return f"Excellent health. You're healthier than {percentile}% of {ethnicity_display} people your age."
+        elif score >= 70:
+            return f"Good health with room for improvement. You're at the {percentile}th percentile among {ethnicity_display} individuals."
+        elif score >= 60:
+            return f"Fair health. Focus on key improvements to boost your score within your demographic."
+        else:
+            return f"Your health needs attention. Consider consulting healthcare providers familiar with {ethnicity_display} health patterns."
+    
+    def _get_ethnicity_context(self, ethnicity: str) -> str:
+        """Get ethnicity-specific health context"""
+        return _ETHNICITY_CONTEXTS.get(ethnicity, _DEFAULT_ETHNICITY_CONTEXT)
@@ -0,0 +1,48 @@
+"""
+Minimal circuit breaker for calls to external AI services
+"""
+
+import time
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Skips calls to a failing dependency for a cooldown window.
+
+    After `failure_threshold` consecutive failures the breaker opens and
+    `allow()` returns False until `cooldown_seconds` have passed; the next
+    call is then let through as a trial, and a success closes the breaker.
+    """
+    
+    def __init__(self, failure_threshold: int = 5, cooldown_seconds: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+    
+    @property
+    def consecutive_failures(self) -> int:
+        return self._consecutive_failures
+    
+    @property
+    def is_open(self) -> bool:
+        return self._consecutive_failures >= self.failure_threshold
+    
+    def allow(self) -> bool:
+        """Whether a call should be attempted right now"""
+        if not self.is_open:
+            return True
+        return time.monotonic() - self._opened_at >= self.cooldown_seconds
+    
+    def record_success(self) -> None:
+        self._consecutive_failures = 0
+    
+    def record_failure(self) -> None:
+        self._consecutive_failures += 1
+        if self.is_open:
+            # (Re)start the cooldown, also when a trial call fails
+            self._opened_at = time.monotonic()
@@ -12,6 +12,10 @@ from datetime import datetime
 logger = logging.getLogger(__name__)
 
 
+class GroqServiceError(Exception):
+    """Groq answered, but not with usable predictions or reasoning"""
+
+
 class GroqAIService:
     """
     Service for interacting with Groq AI API using Llama-4 model
@@ -26,6 +30,15 @@ class GroqAIService:
             "Content-Type": "application/json",
             "Authorization": f"Bearer {api_key}"
         }
+        # One pooled client per service so Groq connections are kept alive between requests
+        self._http = httpx.AsyncClient(
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=20)
+        )
+    
+    async def aclose(self) -> None:
+        """Close pooled connections to the Groq API"""
+        await self._http.aclose()
     
     async def predict_disease_risks(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -36,57 +49,57 @@ class GroqAIService:
             
         Returns:
             Dict containing risk predictions, recommendations, and confidence scores
-        """
-        try:
-            # Create comprehensive prompt for AI analysis
-            prompt = self._create_assessment_prompt(user_data)
             
-            # Make API call to Groq
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    self.base_url,
-                    headers=self.headers,
-                    json={
-                        "model": self.model,
-                        "messages": [
-                            {
-                                "role": "system",
-                                "content": self._get_system_prompt()
-                            },
-                            {
-                                "role": "user",
-                                "content": prompt
-                            }
-                        ],
-                        "temperature": 0.3,  # Lower temperature for more consistent medical predictions
-                        "max_tokens": 2000,
-                        "response_format": {"type": "json_object"}
+        Raises:
+            httpx.HTTPError: the request failed, timed out or got a non-200 status
+            GroqServiceError: the response could not be read as predictions
+        """
+        # Create comprehensive prompt for AI analysis
+        prompt = self._create_assessment_prompt(user_data)
+        
+        # Make API call to Groq
+        response = await self._http.post(
+            self.base_url,
+            headers=self.headers,
+            json={
+                "model": self.model,
+                "messages": [
+                    {
+                        "role": "system",
+                        "content": self._get_system_prompt()
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt
                     }
-                )
-            
-            if response.status_code != 200:
-                logger.error(f"Groq API error: {response.status_code} - {response.text}")
-                raise Exception(f"Groq API request failed: {response.status_code}")
-            
-            # Parse AI response
-            ai_response = response.json()
-            content = ai_response["choices"][0]["message"]["content"]
-            
-            # Parse JSON response from AI
+                ],
+                "temperature": 0.3,  # Lower temperature for more consistent medical predictions
+                "max_tokens": 2000,
+                "response_format": {"type": "json_object"}
+            }
+        )
+        
+        if response.status_code != 200:
+            logger.error(f"Groq API error: {response.status_code} - {response.text}")
+            raise httpx.HTTPStatusError(
+                f"Groq API request failed: {response.status_code}",
+                request=response.request,
+                response=response
+            )
+        
+        try:
+            # Parse AI response and the JSON predictions inside it
+            content = response.json()["choices"][0]["message"]["content"]
             predictions = json.loads(content)
             
             # Validate and format predictions
             formatted_predictions = self._format_predictions(predictions)
-            
-            logger.info(f"Successfully generated AI predictions for user")
-            return formatted_predictions
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse AI response as JSON: {e}")
-            return self._get_fallback_predictions()
-        except Exception as e:
-            logger.error(f"Groq AI prediction error: {e}")
-            return self._get_fallback_predictions()
+        except (ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+            logger.error(f"Failed to parse AI response: {e}")
+            raise GroqServiceError(f"Unusable Groq response: {e}") from e
+        
+        logger.info(f"Successfully generated AI predictions for user")
+        return formatted_predictions
     
     def _get_system_prompt(self) -> str:
         """
@@ -300,82 +313,20 @@ Provide specific, actionable recommendations tailored to this individual's profi
         
         return formatted
     
-    def _get_fallback_predictions(self) -> Dict[str, Any]:
-        """
-        Provide fallback predictions if AI service fails
-        """
-        return {
-            "predictions": [
-                {
-                    "disease_name": "Heart Disease",
-                    "risk_score": 15,
-                    "risk_category": "Low",
-                    "confidence_score": 30,
-                    "recommendations": [
-                        "AI service temporarily unavailable",
-                        "Please consult with your healthcare provider",
-                        "Maintain a healthy lifestyle with regular exercise",
-                        "Follow a balanced diet low in saturated fats",
-                        "Monitor blood pressure regularly"
-                    ],
-                    "key_risk_factors": ["Service unavailable"]
-                },
-                {
-                    "disease_name": "Diabetes",
-                    "risk_score": 12,
-                    "risk_category": "Low",
-                    "confidence_score": 30,
-                    "recommendations": [
-                        "AI service temporarily unavailable",
-                        "Please consult with your healthcare provider",
-                        "Maintain healthy blood sugar levels",
-                        "Exercise regularly and maintain healthy weight",
-                        "Monitor carbohydrate intake"
-                    ],
-                    "key_risk_factors": ["Service unavailable"]
-                },
-                {
-                    "disease_name": "Cancer",
-                    "risk_score": 10,
-                    "risk_category": "Low",
-                    "confidence_score": 30,
-                    "recommendations": [
-                        "AI service temporarily unavailable",
-                        "Please consult with your healthcare provider",
-                        "Follow recommended cancer screening guidelines",
-                        "Maintain a healthy lifestyle",
-                        "Avoid tobacco and limit alcohol consumption"
-                    ],
-                    "key_risk_factors": ["Service unavailable"]
-                }
-            ],
-            "model_version": "Fallback-System",
-            "prediction_date": datetime.utcnow().isoformat(),
-            "confidence_scores": {
-                "heart_disease": 0.3,
-                "diabetes": 0.3,
-                "cancer": 0.3
-            },
-            "overall_assessment": {
-                "health_score": 75,
-                "primary_concerns": ["AI service unavailable"],
-                "positive_factors": ["Seeking health assessment"],
-                "immediate_actions": ["Consult healthcare provider", "Maintain healthy lifestyle"]
-            },
-            "analysis_notes": "AI prediction service is temporarily unavailable. These are generic recommendations. Please consult with your healthcare provider for personalized medical advice."
-        }
-    
     async def generate_health_reasoning(self, user_data: Dict[str, Any], algorithm_results: Dict[str, Any]) -> Dict[str, Any]:
         """
         Generate Llama-4 reasoning for health score and lifestyle improvements
+        
+        Raises:
+            httpx.HTTPError: the request failed, timed out or got a non-200 status
+            GroqServiceError: the response could not be read as reasoning
         """
-        try:
-            health_score = algorithm_results.get('health_score', 75)
-            life_expectancy = algorithm_results.get('life_expectancy', {})
-            risk_assessments = algorithm_results.get('risk_assessments', [])
-            
-            # Create prompt for health reasoning
-            prompt = f"""Based on this health assessment, please provide detailed reasoning and personalized insights:
+        health_score = algorithm_results.get('health_score', 75)
+        life_expectancy = algorithm_results.get('life_expectancy', {})
+        risk_assessments = algorithm_results.get('risk_assessments', [])
+        
+        # Create prompt for health reasoning
+        prompt = f"""Based on this health assessment, please provide detailed reasoning and personalized insights:
 
 HEALTH SCORE: {health_score}/100
 LIFE EXPECTANCY: {life_expectancy.get('current_life_expectancy', 'Unknown')} years
@@ -401,54 +352,62 @@ Focus on:
 2. Specific lifestyle changes that would improve their score
 3. Personal insights based on their unique profile"""
 
-            # Make API call to Groq for reasoning
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    self.base_url,
-                    headers=self.headers,
-                    json={
-                        "model": self.model,
-                        "messages": [
-                            {
-                                "role": "system",
-                                "content": "You are a medical AI that provides clear, personalized health insights and reasoning. Always respond in valid JSON format."
-                            },
-                            {
-                                "role": "user",
-                                "content": prompt
-                            }
-                        ],
-                        "temperature": 0.4,
-                        "max_tokens": 1000,
-                        "response_format": {"type": "json_object"}
+        # Make API call to Groq for reasoning
+        response = await self._http.post(
+            self.base_url,
+            headers=self.headers,
+            json={
+                "model": self.model,
+                "messages": [
+                    {
+                        "role": "system",
+                        "content": "You are a medical AI that provides clear, personalized health insights and reasoning. Always respond in valid JSON format."
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt
                     }
-                )
-            
-            if response.status_code == 200:
-                ai_response = response.json()
-                content = ai_response["choices"][0]["message"]["content"]
-                return json.loads(content)
-            else:
-                raise Exception(f"Groq API error: {response.status_code}")
-                
-        except Exception as e:
-            logger.warning(f"Llama-4 reasoning failed: {e}")
-            # Return fallback reasoning
-            return {
-                "health_score_reasoning": f"Your health score of {algorithm_results.get('health_score', 75)}/100 reflects your current lifestyle factors, age, and risk assessments. This score considers your smoking status, exercise habits, alcohol consumption, and other health indicators.",
-                "lifestyle_improvements": [
-                    "Increase physical activity to at least 150 minutes per week",
-                    "Maintain a balanced diet rich in fruits and vegetables",
-                    "Ensure adequate sleep (7-9 hours nightly)",
-                    "Manage stress through relaxation techniques",
-                    "Schedule regular health check-ups"
                 ],
-                "personalized_insights": [
-                    "Your assessment shows areas for potential improvement",
-                    "Focus on the highest-impact lifestyle changes first",
-                    "Small, consistent changes can lead to significant health improvements"
-                ]
+                "temperature": 0.4,
+                "max_tokens": 1000,
+                "response_format": {"type": "json_object"}
             }
+        )
+        
+        if response.status_code != 200:
+            raise httpx.HTTPStatusError(
+                f"Groq reasoning request failed: {response.status_code}",
+                request=response.request,
+                response=response
+            )
+        
+        try:
+            reasoning = json.loads(response.json()["choices"][0]["message"]["content"])
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            raise GroqServiceError(f"Unusable Groq reasoning: {e}") from e
+        if not isinstance(reasoning, dict):
+            raise GroqServiceError("Unusable Groq reasoning: not a JSON object")
+        return reasoning
+    
+    def get_fallback_reasoning(self, algorithm_results: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Provide fallback reasoning if the Llama-4 call fails or is skipped
+        """
+        return {
+            "health_score_reasoning": f"Your health score of {algorithm_results.get('health_score', 75)}/100 reflects your current lifestyle factors, age, and risk assessments. This score considers your smoking status, exercise habits, alcohol consumption, and other health indicators.",
+            "lifestyle_improvements": [
+                "Increase physical activity to at least 150 minutes per week",
+                "Maintain a balanced diet rich in fruits and vegetables",
+                "Ensure adequate sleep (7-9 hours nightly)",
+                "Manage stress through relaxation techniques",
+                "Schedule regular health check-ups"
+            ],
+            "personalized_insights": [
+                "Your assessment shows areas for potential improvement",
+                "Focus on the highest-impact lifestyle changes first",
+                "Small, consistent changes can lead to significant health improvements"
+            ]
+        }
     
     def _calculate_bmi(self, user_data: Dict[str, Any]) -> str:
         """Calculate BMI from user data"""
@@ -11,6 +11,24 @@ from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
+# Known ethnicity values (form keys and display labels) mapped to lookup keys;
+# anything else is normalized on the fly by _ethnicity_key
+_ETHNICITY_KEYS = {
+    label: label.lower().replace(' ', '_')
+    for key in ('caucasian', 'african_american', 'hispanic', 'asian',
+                'native_american', 'pacific_islander', 'other')
+    for label in (key, key.replace('_', ' ').title())
+}
+
+_HIGH_RISK_DIABETES_ETHNICITIES = frozenset((
+    'african_american', 'hispanic', 'native_american',
+    'asian', 'pacific_islander'
+))
+
+
+def _ethnicity_key(ethnicity: str) -> str:
+    return _ETHNICITY_KEYS.get(ethnicity) or ethnicity.lower().replace(' ', '_')
+
 
 @dataclass
 class RiskFactors:
@@ -192,7 +210,7 @@ class FraminghamRiskCalculator:
             'caucasian': 1.0
         }
         
-        ethnicity_key = ethnicity.lower().replace(' ', '_')
+        ethnicity_key = _ethnicity_key(ethnicity)
         multiplier = adjustments.get(ethnicity_key, 1.0)
         return risk * multiplier
     
@@ -319,13 +337,7 @@ class ADADiabetesRiskCalculator:
     @staticmethod
     def _get_ethnicity_risk(ethnicity: str) -> int:
         """Get ethnicity-based risk score"""
-        high_risk_ethnicities = [
-            'african_american', 'hispanic', 'native_american', 
-            'asian', 'pacific_islander'
-        ]
-        
-        ethnicity_key = ethnicity.lower().replace(' ', '_')
-        return 2 if ethnicity_key in high_risk_ethnicities else 0
+        return 2 if _ethnicity_key(ethnicity) in _HIGH_RISK_DIABETES_ETHNICITIES else 0
     
     @staticmethod
     def _score_to_percentage(score: int, sex: str) -> float:
@@ -501,7 +513,7 @@ class CancerRiskCalculator:
             'native_american': 1.2
         }
         
-        ethnicity_key = ethnicity.lower().replace(' ', '_')
+        ethnicity_key = _ethnicity_key(ethnicity)
         multiplier = adjustments.get(ethnicity_key, 1.0)
         return risk * multiplier
     
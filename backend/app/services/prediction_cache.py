@@ -0,0 +1,35 @@
+"""
+In-process cache for AI prediction results keyed by assessment content
+"""
+
+from typing import Any, Dict, Iterable, Optional
+from cachetools import TTLCache
+import hashlib
+import orjson
+
+
+class PredictionCache:
+    """
+    Remembers finished predictions so an unchanged assessment does not go
+    back to the LLM.
+
+    Keys are a SHA-256 of the canonical (sorted-key) JSON of the user data
+    plus the requested prediction types, so the same answers submitted
+    twice hit the same entry regardless of dict ordering.
+    """
+
+    def __init__(self, maxsize: int = 1000, ttl_seconds: float = 3600):
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl_seconds)
+
+    @staticmethod
+    def make_key(user_data: Dict[str, Any], prediction_types: Iterable[str]) -> str:
+        digest = hashlib.sha256(orjson.dumps(user_data, option=orjson.OPT_SORT_KEYS, default=str))
+        digest.update(b"|")
+        digest.update(",".join(sorted(prediction_types)).encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._cache.get(key)
+
+    def set(self, key: str, predictions: Dict[str, Any]) -> None:
+        self._cache[key] = predictions
@@ -0,0 +1,146 @@
+"""
+Tests for bearer-token verification and its cache
+"""
+
+import jwt
+import pytest
+from cachetools import TTLCache
+from fastapi.testclient import TestClient
+
+from app.api.api_v1.endpoints import auth
+from app.core import auth_middleware
+from app.core.config import settings
+from app.core.supabase import get_supabase_client
+from app.main import app
+
+USER = {"id": "user-1", "email": "user@example.com"}
+
+
+class _FakeSupabase:
+    def is_connected(self):
+        return False
+
+    async def get_user_profile(self, user_id):
+        return None
+
+
+@pytest.fixture
+def verified_tokens(monkeypatch):
+    """Tokens passed to verification; only "good-token" verifies"""
+    seen = []
+
+    async def verify(token):
+        seen.append(token)
+        return USER if token == "good-token" else None
+
+    monkeypatch.setattr(auth_middleware, "verify_token_cached", verify)
+    app.dependency_overrides[get_supabase_client] = _FakeSupabase
+    yield seen
+    app.dependency_overrides.clear()
+
+
+def _bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_public_routes_do_not_verify_tokens(verified_tokens):
+    response = TestClient(app).get("/health", headers=_bearer("garbage"))
+
+    assert response.status_code == 200
+    assert verified_tokens == []
+
+
+def test_protected_route_verifies_token_once(verified_tokens):
+    response = TestClient(app).get("/api/v1/auth/me", headers=_bearer("good-token"))
+
+    assert response.status_code == 200
+    assert response.json()["user"] == USER
+    assert verified_tokens == ["good-token"]
+
+
+@pytest.mark.parametrize("headers", [{}, _bearer("garbage")])
+def test_missing_or_invalid_token_is_401(verified_tokens, headers):
+    response = TestClient(app).get("/api/v1/auth/me", headers=headers)
+
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+
+
+def test_logout_forgets_the_bearer_token(verified_tokens, monkeypatch):
+    forgotten = []
+    monkeypatch.setattr(auth, "forget_token", forgotten.append)
+
+    response = TestClient(app).post("/api/v1/auth/logout", headers=_bearer("good-token"))
+
+    assert response.status_code == 200
+    assert forgotten == ["good-token"]
+
+
+class _Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def token_cache(monkeypatch):
+    """An empty token cache over a fake clock; GoTrue accepts only tokens whose sub is good"""
+    clock = _Clock(1_700_000_000.0)
+    calls = []
+
+    class _GoTrue:
+        async def verify_user_token(self, token):
+            calls.append(token)
+            claims = jwt.decode(token, options={"verify_signature": False})
+            return USER if claims["sub"] == "good" else None
+
+    monkeypatch.setattr(auth_middleware, "_token_cache", TTLCache(maxsize=16, ttl=60))
+    monkeypatch.setattr(auth_middleware, "time", clock)
+    monkeypatch.setattr(auth_middleware, "_verify_token_locally", lambda token: None)
+    monkeypatch.setattr(auth_middleware, "get_supabase_client", _GoTrue)
+    return clock, calls
+
+
+def _token(sub, exp):
+    # Verification itself is faked; only the exp claim matters to the cache
+    return jwt.encode({"sub": sub, "exp": exp}, "test-signing-key-of-32-bytes-len", algorithm="HS256")
+
+
+@pytest.mark.asyncio
+async def test_verified_token_is_reused_until_its_exp(token_cache):
+    clock, calls = token_cache
+    token = _token("good", exp=clock.now + 10)
+
+    assert await auth_middleware.verify_token_cached(token) == USER
+    clock.now += 9
+    assert await auth_middleware.verify_token_cached(token) == USER
+    assert len(calls) == 1
+
+    clock.now += 2
+    await auth_middleware.verify_token_cached(token)
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_lifetime_is_capped_by_ttl_setting(token_cache, monkeypatch):
+    clock, calls = token_cache
+    monkeypatch.setattr(settings, "JWT_CACHE_TTL_SECONDS", 30)
+    token = _token("good", exp=clock.now + 3600)
+
+    await auth_middleware.verify_token_cached(token)
+    clock.now += 31
+    await auth_middleware.verify_token_cached(token)
+
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_verification_is_not_cached(token_cache):
+    clock, calls = token_cache
+    token = _token("bad", exp=clock.now + 3600)
+
+    assert await auth_middleware.verify_token_cached(token) is None
+    assert await auth_middleware.verify_token_cached(token) is None
+    assert len(calls) == 2
@@ -0,0 +1,90 @@
+"""
+Tests that the ethnicity-aware predictor's batch and memoized paths match the scalar code
+"""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from app.ml.ethnicity_risk_predictor import _ETHNICITIES, _ETHNICITY_INDEX, EthnicityAwareMedicalRiskPredictor
+
+# Every ethnicity plus an unknown one, ages on both sides of the base-risk caps,
+# and every combination of the smoking and family-history inputs
+USERS = [
+    {
+        "ethnicity": ethnicity,
+        "age": age,
+        "smokingStatus": smoking,
+        "familyHeartDisease": heart,
+        "familyDiabetes": diabetes,
+        "familyCancer": cancer,
+    }
+    for ethnicity, age, smoking, heart, diabetes, cancer in itertools.product(
+        _ETHNICITIES + ("Unknown",),
+        (18, 30, 45, 62, 80, 95),
+        ("never", "former", "Current"),
+        (False, True),
+        (False, True),
+        (False, True),
+    )
+]
+
+
+def _scalar_risks(predictor, user):
+    eth_idx = _ETHNICITY_INDEX.get(user["ethnicity"].lower(), 0)
+    age = int(user["age"])
+    return (
+        predictor._calculate_heart_risk(user, eth_idx, age),
+        predictor._calculate_diabetes_risk(user, eth_idx, age),
+        predictor._calculate_cancer_risk(user, eth_idx, age),
+    )
+
+
+def test_predict_risk_batch_matches_scalar_path_exactly():
+    predictor = EthnicityAwareMedicalRiskPredictor()
+
+    batch = predictor.predict_risk_batch(USERS)
+
+    expected = np.array([_scalar_risks(predictor, user) for user in USERS])
+    assert batch.shape == (len(USERS), 3)
+    assert np.array_equal(batch, expected)
+
+
+def test_categorize_risk_batch_matches_scalar_path():
+    predictor = EthnicityAwareMedicalRiskPredictor()
+    risks = np.array([0.0, 0.0999, 0.10, 0.15, 0.1999, 0.20, 0.5, 0.8])
+
+    categories = predictor.categorize_risk_batch(risks)
+
+    assert list(categories) == [predictor._categorize_risk(risk) for risk in risks]
+
+
+def test_predict_risk_memoizes_per_read_input():
+    predictor = EthnicityAwareMedicalRiskPredictor()
+    user = USERS[100]
+
+    first = predictor.predict_risk(user)
+
+    assert first == predictor._predict_risk(user)
+    # Inputs predict_risk does not read share the cached result
+    assert predictor.predict_risk({**user, "weight": 95}) is first
+
+
+@pytest.mark.parametrize("change", [
+    {"ethnicity": "Unknown"},
+    {"age": 81},
+    {"smokingStatus": "current"},
+    {"familyHeartDisease": True},
+    {"familyDiabetes": True},
+    {"familyCancer": True},
+])
+def test_predict_risk_cache_separates_read_inputs(change):
+    predictor = EthnicityAwareMedicalRiskPredictor()
+    user = {**USERS[0], "age": 80}
+    changed = {**user, **change}
+
+    predictor.predict_risk(user)
+
+    assert predictor.predict_risk(changed) == predictor._predict_risk(changed)
+    assert len(predictor._result_cache) == 2
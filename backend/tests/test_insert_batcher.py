@@ -0,0 +1,78 @@
+"""
+Tests for InsertBatcher's coalescing, failure isolation and shutdown draining
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.insert_batcher import InsertBatcher
+
+
+class _Table:
+    """Records each write; rows whose "bad" flag is set make the write fail with `error`"""
+
+    def __init__(self, error: Exception = ValueError("rejected")):
+        self.writes = []
+        self.error = error
+
+    async def write_rows(self, rows):
+        self.writes.append(list(rows))
+        if any(row.get("bad") for row in rows):
+            raise self.error
+
+
+@pytest.mark.asyncio
+async def test_concurrent_inserts_coalesce_into_one_write():
+    table = _Table()
+    batcher = InsertBatcher(table.write_rows)
+
+    await asyncio.gather(*(batcher.insert({"n": n}) for n in range(3)))
+
+    assert table.writes == [[{"n": 0}, {"n": 1}, {"n": 2}]]
+    await batcher.close()
+
+
+@pytest.mark.asyncio
+async def test_bad_row_fails_only_its_own_caller():
+    table = _Table()
+    batcher = InsertBatcher(table.write_rows, unwritten_errors=(ValueError,))
+
+    results = await asyncio.gather(
+        batcher.insert({"n": 0}), batcher.insert({"n": 1, "bad": True}), batcher.insert({"n": 2}),
+        return_exceptions=True
+    )
+
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], ValueError)
+    assert table.writes[1:] == [[{"n": 0}], [{"n": 1, "bad": True}], [{"n": 2}]]
+    await batcher.close()
+
+
+@pytest.mark.asyncio
+async def test_possibly_committed_batch_is_not_retried():
+    table = _Table(error=httpx.ReadTimeout("no response"))
+    batcher = InsertBatcher(table.write_rows, unwritten_errors=(httpx.ConnectError,))
+
+    results = await asyncio.gather(
+        batcher.insert({"n": 0}), batcher.insert({"n": 1, "bad": True}),
+        return_exceptions=True
+    )
+
+    assert all(isinstance(result, httpx.ReadTimeout) for result in results)
+    assert len(table.writes) == 1
+    await batcher.close()
+
+
+@pytest.mark.asyncio
+async def test_close_writes_queued_rows():
+    table = _Table()
+    batcher = InsertBatcher(table.write_rows)
+    pending = [asyncio.create_task(batcher.insert({"n": n})) for n in range(3)]
+    await asyncio.sleep(0)
+
+    await batcher.close()
+
+    assert [row for write in table.writes for row in write] == [{"n": 0}, {"n": 1}, {"n": 2}]
+    await asyncio.gather(*pending)
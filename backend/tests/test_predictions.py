@@ -0,0 +1,195 @@
+"""
+Tests for the /predict endpoints' Groq failure handling and caching
+"""
+
+import httpx
+import orjson
+import pytest
+
+from app.api.api_v1.endpoints import predictions
+from app.api.api_v1.endpoints.predictions import PredictionCache, PredictionRequest, predict_disease_risk
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.groq_ai_service import GroqAIService
+
+
+USER_DATA = dict(predictions._DEFAULT_SAMPLE_USER_DATA)
+
+
+def _groq_service(handler) -> GroqAIService:
+    """A Groq service whose HTTP calls are answered by `handler`"""
+    service = GroqAIService("test-key")
+    service._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return service
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(predictions, "_PREDICTION_CACHE", PredictionCache())
+    monkeypatch.setattr(predictions, "_GROQ_SERVICE", None)
+    monkeypatch.setattr(predictions, "_PREDICTION_BREAKER", CircuitBreaker(failure_threshold=2, cooldown_seconds=60))
+    monkeypatch.setattr(predictions, "_REASONING_BREAKER", CircuitBreaker(failure_threshold=2, cooldown_seconds=60))
+
+
+def _install_groq(monkeypatch, handler) -> None:
+    monkeypatch.setattr(predictions, "_GROQ_SERVICE", _groq_service(handler))
+
+
+@pytest.mark.asyncio
+async def test_failed_groq_call_is_not_cached(monkeypatch):
+    def unreachable(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    _install_groq(monkeypatch, unreachable)
+    request = PredictionRequest(user_data=USER_DATA)
+
+    await predict_disease_risk(request)
+
+    cache_key = PredictionCache.make_key(USER_DATA, request.prediction_types)
+    assert predictions._PREDICTION_CACHE.get(cache_key) is None
+
+
+def _is_algorithm_fallback(result) -> bool:
+    return result["model_version"].endswith("(AI Fallback)")
+
+
+@pytest.mark.asyncio
+async def test_groq_server_error_falls_back_to_medical_algorithms(monkeypatch):
+    _install_groq(monkeypatch, lambda request: httpx.Response(503, text="unavailable"))
+
+    result = await predict_disease_risk(PredictionRequest(user_data=USER_DATA))
+
+    assert _is_algorithm_fallback(result)
+
+
+@pytest.mark.asyncio
+async def test_unusable_groq_response_falls_back_to_medical_algorithms(monkeypatch):
+    content = {"choices": [{"message": {"content": "not json"}}]}
+    _install_groq(monkeypatch, lambda request: httpx.Response(200, json=content))
+
+    result = await predict_disease_risk(PredictionRequest(user_data=USER_DATA))
+
+    assert _is_algorithm_fallback(result)
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_skips_groq(monkeypatch):
+    calls = []
+
+    def failing(request):
+        calls.append(request)
+        return httpx.Response(500)
+
+    _install_groq(monkeypatch, failing)
+    for _ in range(3):
+        result = await predict_disease_risk(PredictionRequest(user_data=USER_DATA))
+        assert _is_algorithm_fallback(result)
+
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_falls_back_to_medical_algorithms(monkeypatch):
+    _install_groq(monkeypatch, lambda request: httpx.Response(503))
+    cache_key = PredictionCache.make_key(USER_DATA, PredictionRequest().prediction_types)
+
+    events = [event async for event in predictions._stream_prediction_events(USER_DATA, cache_key)]
+
+    assert [event.split(b"\n", 1)[0] for event in events] == [b"event: result", b"event: done"]
+    assert b"(AI Fallback)" in events[0]
+
+
+@pytest.mark.asyncio
+async def test_stream_error_does_not_echo_exception_text(monkeypatch):
+    async def broken(user_data):
+        raise RuntimeError("postgres://admin:secret@db")
+
+    monkeypatch.setattr(predictions, "request_ai_predictions", broken)
+    cache_key = PredictionCache.make_key(USER_DATA, PredictionRequest().prediction_types)
+
+    events = [event async for event in predictions._stream_prediction_events(USER_DATA, cache_key)]
+
+    assert events == [b'event: error\ndata: {"detail":"Prediction failed"}\n\n']
+
+
+@pytest.mark.asyncio
+async def test_reasoning_breaker_opens_on_server_errors():
+    calls = []
+
+    def failing(request):
+        calls.append(request)
+        return httpx.Response(502)
+
+    service = _groq_service(failing)
+    for _ in range(3):
+        assert await predictions.generate_reasoning_with_timeout(service, USER_DATA, {}) is None
+
+    assert len(calls) == 2
+    assert predictions._REASONING_BREAKER.is_open
+
+
+def _chat_response(content) -> httpx.Response:
+    return httpx.Response(200, json={"choices": [{"message": {"content": orjson.dumps(content).decode()}}]})
+
+
+_AI_PREDICTIONS = {"heart_disease": {"risk_percentage": 12, "risk_category": "Medium", "confidence_score": 80}}
+_AI_REASONING = {"health_score_reasoning": "ok", "lifestyle_improvements": [], "personalized_insights": []}
+
+
+def _predictions_then(reasoning_response):
+    """Answers the predictions call, then every reasoning call with `reasoning_response`"""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return _chat_response(_AI_PREDICTIONS) if len(calls) == 1 else reasoning_response
+
+    return handler
+
+
+@pytest.mark.asyncio
+async def test_fully_enriched_predictions_are_cached(monkeypatch):
+    _install_groq(monkeypatch, _predictions_then(_chat_response(_AI_REASONING)))
+    request = PredictionRequest(user_data=USER_DATA)
+
+    result = await predict_disease_risk(request)
+
+    assert result["llama_reasoning"] == _AI_REASONING
+    cache_key = PredictionCache.make_key(USER_DATA, request.prediction_types)
+    assert predictions._PREDICTION_CACHE.get(cache_key) is result
+
+
+@pytest.mark.asyncio
+async def test_predictions_with_fallback_reasoning_are_not_cached(monkeypatch):
+    _install_groq(monkeypatch, _predictions_then(httpx.Response(503)))
+    request = PredictionRequest(user_data=USER_DATA)
+
+    result = await predict_disease_risk(request)
+
+    assert result["model_version"] == "Llama-4-Groq-AI"
+    assert result["llama_reasoning"] != _AI_REASONING
+    cache_key = PredictionCache.make_key(USER_DATA, request.prediction_types)
+    assert predictions._PREDICTION_CACHE.get(cache_key) is None
+
+
+@pytest.mark.asyncio
+async def test_stream_does_not_cache_fallback_reasoning(monkeypatch):
+    _install_groq(monkeypatch, _predictions_then(httpx.Response(503)))
+    cache_key = PredictionCache.make_key(USER_DATA, PredictionRequest().prediction_types)
+
+    events = [event async for event in predictions._stream_prediction_events(USER_DATA, cache_key)]
+
+    assert events[-1].startswith(b"event: done")
+    assert predictions._PREDICTION_CACHE.get(cache_key) is None
+
+
+@pytest.mark.asyncio
+async def test_test_predict_does_not_echo_upstream_errors(monkeypatch):
+    def unreachable(request):
+        raise httpx.ConnectError("connect to 10.0.0.7:443 failed", request=request)
+
+    _install_groq(monkeypatch, unreachable)
+
+    result = await predictions.test_predict_disease_risk()
+
+    assert result["model_version"] == "Groq-AI-Test-Mode"
+    assert "10.0.0.7" not in orjson.dumps(result).decode()
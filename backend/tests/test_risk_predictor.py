@@ -0,0 +1,103 @@
+"""
+Tests that the medical-grade predictor's batch paths match the scalar code
+"""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from app.ml.risk_predictor import _ETHNICITY_CODES, EthnicityAwareMedicalRiskPredictor
+
+# Every ethnicity plus an unknown one, both genders, ages across the age-group
+# and diabetes-table edges, and every lifestyle answer the models decode
+USERS = [
+    {
+        "ethnicity": ethnicity,
+        "gender": gender,
+        "age": age,
+        "smokingStatus": smoking,
+        "activityLevel": activity,
+        "alcoholConsumption": alcohol,
+        "familyHeartDisease": family,
+        "familyDiabetes": family,
+        "familyCancer": not family,
+        "height": 170,
+        "weight": weight,
+        "sleepHours": sleep,
+        "stressLevel": stress,
+    }
+    for ethnicity, gender, age, smoking, activity, alcohol, family, weight, (sleep, stress) in itertools.product(
+        tuple(_ETHNICITY_CODES) + ("Unknown",),
+        ("male", "female"),
+        (18, 45, 62, 95),
+        ("never", "Former smoker", "current"),
+        ("sedentary", "moderate", "very_active"),
+        ("never", "heavy"),
+        (False, True),
+        (60, 80, 100),
+        ((6.5, 2), (8, 9)),
+    )
+]
+
+
+def _predictions(risks):
+    return {
+        disease: {"risk_score": risk}
+        for disease, risk in zip(("heart_disease", "diabetes", "cancer"), risks)
+    }
+
+
+def test_predict_risk_batch_matches_scalar_path_exactly():
+    predictor = EthnicityAwareMedicalRiskPredictor()
+
+    batch = predictor.predict_risk_batch(pd.DataFrame(USERS))
+
+    expected = np.array([predictor._score_all(user) for user in USERS])
+    assert batch.shape == (len(USERS), 3)
+    assert np.array_equal(batch, expected)
+
+
+def test_health_vitality_index_batch_matches_scalar_path():
+    predictor = EthnicityAwareMedicalRiskPredictor()
+    df = pd.DataFrame(USERS)
+    risks = predictor.predict_risk_batch(df)
+
+    scores = predictor.calculate_health_vitality_index_batch(risks, df)
+
+    expected = [
+        predictor.calculate_health_vitality_index(_predictions(row), user)
+        for row, user in zip(risks, USERS)
+    ]
+    assert list(scores) == expected
+
+
+def test_population_percentile_batch_matches_scalar_path():
+    predictor = EthnicityAwareMedicalRiskPredictor()
+    users = [user for user in USERS if user["ethnicity"] != "Unknown"]
+    scores = np.arange(len(users)) % 101
+
+    percentiles = predictor.get_population_percentile_batch(
+        scores,
+        np.array([user["age"] for user in users]),
+        np.array([user["gender"] for user in users]),
+        np.array([user["ethnicity"] for user in users]),
+    )
+
+    expected = [
+        predictor.get_population_percentile(int(score), user["age"], user["gender"], user["ethnicity"])
+        for score, user in zip(scores, users)
+    ]
+    assert list(percentiles) == expected
+
+
+def test_predict_risk_reports_study_attributions_for_every_ethnicity():
+    predictor = EthnicityAwareMedicalRiskPredictor()
+
+    for ethnicity in tuple(_ETHNICITY_CODES) + ("unknown",):
+        result = predictor.predict_risk({"ethnicity": ethnicity, "age": 50})
+        for disease in ("heart_disease", "diabetes", "cancer"):
+            assert result[disease]["risk_category"] in ("Low", "Medium", "High")
+            assert result[disease]["algorithm"]
+            assert 0 < result[disease]["confidence"] < 1
+        assert result["health_vitality_index"]["ethnicity_context"].startswith("Based on")
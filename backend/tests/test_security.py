@@ -0,0 +1,35 @@
+"""
+Tests for the lazily resolved encryption key
+"""
+
+import pytest
+from cryptography.fernet import Fernet
+
+from app.core import security
+from app.core.config import settings
+
+
+@pytest.fixture(autouse=True)
+def fresh_key(monkeypatch):
+    security.get_encryption_key.cache_clear()
+    security.get_fernet.cache_clear()
+    yield
+    security.get_encryption_key.cache_clear()
+    security.get_fernet.cache_clear()
+
+
+def test_missing_key_outside_development_fails_on_use(monkeypatch):
+    monkeypatch.setattr(settings, "ENCRYPTION_KEY", None)
+    monkeypatch.setattr(settings, "ENVIRONMENT", "production")
+
+    with pytest.raises(RuntimeError):
+        security.encrypt_sensitive_data("120/80")
+    with pytest.raises(RuntimeError):
+        security.decrypt_sensitive_data("ciphertext")
+
+
+def test_configured_key_round_trips(monkeypatch):
+    monkeypatch.setattr(settings, "ENCRYPTION_KEY", Fernet.generate_key().decode())
+    monkeypatch.setattr(settings, "ENVIRONMENT", "production")
+
+    assert security.decrypt_sensitive_data(security.encrypt_sensitive_data("120/80")) == "120/80"
@@ -0,0 +1,45 @@
+"""
+Tests for SupabaseClient queries, against a PostgREST client on a mock transport
+"""
+
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from postgrest import AsyncPostgrestClient
+
+from app.core.supabase import SupabaseClient
+
+
+@pytest.fixture
+def postgrest_requests():
+    """A SupabaseClient whose PostgREST calls are recorded and answered with no rows"""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json=[])
+
+    http = httpx.AsyncClient(base_url="http://postgrest", transport=httpx.MockTransport(handler))
+    postgrest = AsyncPostgrestClient("http://postgrest", http_client=http)
+    supabase = SupabaseClient()
+    supabase._client = SimpleNamespace(table=postgrest.from_)
+    return supabase, requests
+
+
+@pytest.mark.asyncio
+async def test_risk_prediction_pages_break_date_ties_by_id(postgrest_requests):
+    supabase, requests = postgrest_requests
+
+    await supabase.get_risk_predictions(
+        "user-1",
+        limit=2,
+        before=("2024-05-01T12:00:00+00:00", "6f1c1c3e-0000-4000-8000-000000000001")
+    )
+
+    params = requests[0].url.params
+    assert params["order"] == "prediction_date.desc,id.desc"
+    assert params["or"] == (
+        '(prediction_date.lt."2024-05-01T12:00:00+00:00",'
+        'and(prediction_date.eq."2024-05-01T12:00:00+00:00",id.lt."6f1c1c3e-0000-4000-8000-000000000001"))'
+    )
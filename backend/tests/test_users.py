@@ -0,0 +1,92 @@
+"""
+Tests for the profile update endpoints' error statuses
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.auth_middleware import get_user_id
+from app.core.supabase import get_supabase_client
+from app.main import app
+
+
+class _FakeSupabase:
+    """Profile writes that match no row; `existing` is what a re-read finds"""
+
+    def __init__(self, existing):
+        self.existing = existing
+
+    async def update_user_profile(self, user_id, profile_data):
+        return None
+
+    async def get_user_profile(self, user_id):
+        return self.existing
+
+
+@pytest.fixture
+def client_for():
+    def make(existing):
+        app.dependency_overrides[get_user_id] = lambda: "user-1"
+        app.dependency_overrides[get_supabase_client] = lambda: _FakeSupabase(existing)
+        return TestClient(app)
+
+    yield make
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/api/v1/users/profile/demographics", {"age": 40}),
+    ("/api/v1/users/profile/lifestyle", {"sleep_hours": 7}),
+    ("/api/v1/users/profile/medical-history", {}),
+])
+def test_update_without_profile_is_404(client_for, path, body):
+    response = client_for(None).put(path, json=body)
+
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Profile not found"}
+
+
+def test_failed_write_to_existing_profile_is_400(client_for):
+    response = client_for({"user_id": "user-1"}).put("/api/v1/users/profile/demographics", json={"age": 40})
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Failed to update profile"}
+
+
+class _FakePredictionStore:
+    """Serves a fixed page of predictions and records the cursor it was asked for"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.before = "unset"
+
+    async def get_risk_predictions(self, user_id, limit, before):
+        self.before = before
+        return self.rows[:limit]
+
+
+_PREDICTION_ROWS = [
+    {"id": "6f1c1c3e-0000-4000-8000-000000000002", "prediction_date": "2024-05-01T12:00:00+00:00"},
+    {"id": "6f1c1c3e-0000-4000-8000-000000000001", "prediction_date": "2024-05-01T12:00:00+00:00"},
+]
+
+
+def test_risk_prediction_cursor_carries_date_and_id():
+    store = _FakePredictionStore(_PREDICTION_ROWS)
+    app.dependency_overrides[get_user_id] = lambda: "user-1"
+    app.dependency_overrides[get_supabase_client] = lambda: store
+    try:
+        client = TestClient(app)
+        first = client.get("/api/v1/users/risk-predictions", params={"limit": 2}).json()
+        client.get("/api/v1/users/risk-predictions", params={"limit": 2, "before": first["next_before"]})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert first["next_before"] == "2024-05-01T12:00:00+00:00,6f1c1c3e-0000-4000-8000-000000000001"
+    assert store.before == ("2024-05-01T12:00:00+00:00", "6f1c1c3e-0000-4000-8000-000000000001")
+
+
+def test_malformed_risk_prediction_cursor_is_400(client_for):
+    response = client_for(None).get("/api/v1/users/risk-predictions", params={"before": "2024-05-01"})
+
+    assert response.status_code == 400
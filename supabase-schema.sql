@@ -102,6 +102,8 @@ CREATE INDEX IF NOT EXISTS idx_lab_results_test_date ON lab_results(test_date);
 CREATE INDEX IF NOT EXISTS idx_risk_predictions_user_id ON risk_predictions(user_id);
 CREATE INDEX IF NOT EXISTS idx_risk_predictions_date ON risk_predictions(prediction_date);
 CREATE INDEX IF NOT EXISTS idx_risk_predictions_active ON risk_predictions(is_active);
+CREATE INDEX IF NOT EXISTS idx_risk_predictions_latest ON risk_predictions(user_id, disease_name, prediction_date DESC);
+CREATE INDEX IF NOT EXISTS idx_risk_predictions_user_date ON risk_predictions(user_id, prediction_date DESC, id DESC);
 
 -- Enable Row Level Security (RLS)
 ALTER TABLE user_profiles ENABLE ROW LEVEL SECURITY;
@@ -168,6 +170,8 @@ CREATE TRIGGER update_lab_results_updated_at
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
 -- Create function to handle user profile creation on signup
+-- (the /auth/register endpoint relies on this instead of inserting the profile itself;
+-- the *_complete flags start FALSE via their column defaults)
 CREATE OR REPLACE FUNCTION public.handle_new_user()
 RETURNS TRIGGER AS $$
 BEGIN
@@ -175,7 +179,8 @@ BEGIN
     VALUES (
         NEW.id,
         COALESCE(NEW.raw_user_meta_data->>'full_name', '')
-    );
+    )
+    ON CONFLICT (user_id) DO NOTHING;
     RETURN NEW;
 END;
 $$ LANGUAGE plpgsql SECURITY DEFINER;
@@ -233,3 +238,26 @@ $$ LANGUAGE plpgsql SECURITY DEFINER;
 
 -- Grant execute permission on the function
 GRANT EXECUTE ON FUNCTION get_latest_predictions(UUID) TO authenticated;
+
+-- Latest prediction per disease for a user (full rows, one per disease_name)
+CREATE OR REPLACE FUNCTION get_latest_predictions_per_disease(user_uuid UUID)
+RETURNS SETOF risk_predictions AS $$
+    SELECT DISTINCT ON (rp.disease_name) rp.*
+    FROM risk_predictions rp
+    WHERE rp.user_id = user_uuid
+    ORDER BY rp.disease_name, rp.prediction_date DESC;
+$$ LANGUAGE sql STABLE;
+
+GRANT EXECUTE ON FUNCTION get_latest_predictions_per_disease(UUID) TO authenticated;
+
+-- Delete all of a user's health data in one transaction (single round-trip from the API)
+CREATE OR REPLACE FUNCTION delete_user_cascade(uid UUID)
+RETURNS VOID AS $$
+BEGIN
+    DELETE FROM lab_results WHERE user_id = uid;
+    DELETE FROM risk_predictions WHERE user_id = uid;
+    DELETE FROM user_profiles WHERE user_id = uid;
+END;
+$$ LANGUAGE plpgsql;
+
+GRANT EXECUTE ON FUNCTION delete_user_cascade(UUID) TO authenticated;